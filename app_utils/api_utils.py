@@ -1,7 +1,16 @@
 import json
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+from app_utils.tiles import (
+    TILE_DATASETS,
+    TILE_DIR,
+    tile_dataset_dir,
+    tile_etag,
+    tile_path,
+    tiles_built,
+)
 
 
 def create_data_router(prefix: str, load_fn, process_fn=None):
@@ -19,3 +28,41 @@ def create_data_router(prefix: str, load_fn, process_fn=None):
             raise HTTPException(status_code=500, detail=str(e)) from e
 
     return router
+
+
+def create_tile_router(prefix: str = "/tiles", tile_dir=TILE_DIR):
+    """
+    Serve prebuilt vector tiles with ETag / Cache-Control headers.
+    Tiles are written gzipped by GDAL, so they're sent with Content-Encoding: gzip.
+    """
+    router = APIRouter(prefix=prefix)
+
+    @router.get("/{dataset}/metadata.json")
+    def get_metadata(dataset: str):
+        # also how the app checks the backend is up before switching a map to tiles
+        if dataset not in TILE_DATASETS or not tiles_built(dataset, tile_dir):
+            raise HTTPException(status_code=404, detail=f"No tiles for '{dataset}'")
+        path = tile_dataset_dir(dataset, tile_dir) / "metadata.json"
+        return JSONResponse(content=json.loads(path.read_text()))
+
+    @router.get("/{dataset}/{z}/{x}/{y}.pbf")
+    def get_tile(dataset: str, z: int, x: int, y: int, request: Request):
+        path = tile_path(dataset, z, x, y, tile_dir=tile_dir)
+        if path is None:
+            raise HTTPException(status_code=404, detail=f"No tiles for '{dataset}'")
+        if not path.is_file():
+            return Response(status_code=204)  # empty tile
+
+        headers = {
+            "ETag": tile_etag(path),
+            "Cache-Control": "public, max-age=86400",
+        }
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=path.read_bytes(),
+            media_type="application/x-protobuf",
+            headers={**headers, "Content-Encoding": "gzip"},
+        )
+
+    return router
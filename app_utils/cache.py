@@ -0,0 +1,321 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Two-tier (memory + disk) cache used by data_loading.masterload
+"""
+
+import hashlib
+import json
+import logging
+import re
+import shutil
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import shapely
+
+_SINGLE_FRAME = "__frame__"
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_nbytes(obj):
+    """
+    Rough in-memory size of a cached value (frames, series, dicts of frames, anything
+    else).
+    Geometry columns only report pointer sizes in pandas, so we add 16 bytes per coordinate.
+    """
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(v) for v in obj.values())
+    if isinstance(obj, pd.Series):  # e.g. a GeoSeries
+        obj = obj.to_frame()
+    if isinstance(obj, pd.DataFrame):
+        nbytes = int(obj.memory_usage(deep=True, index=True).sum())
+        for col in obj.columns[obj.dtypes == "geometry"]:
+            nbytes += int(shapely.get_num_coordinates(obj[col].values).sum()) * 16
+        return nbytes
+    return sys.getsizeof(obj)
+
+
+class MemoryLRU:
+    """
+    Thread-safe LRU keyed by anything hashable, bounded by an approximate byte budget.
+    The most recently added item is always kept, even if it alone is over budget.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()  # key -> (value, nbytes)
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def put(self, key, value, nbytes=None):
+        nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+        with self._lock:
+            self.pop(key)
+            self._items[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes and len(self._items) > 1:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._nbytes -= evicted
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            value, nbytes = self._items.pop(key)
+            self._nbytes -= nbytes
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+
+
+def fingerprint_files(paths):
+    """
+    Cheap freshness signature for source files: (name, size, mtime).
+    Returns None if any file is missing or remote, meaning "don't cache on disk".
+    """
+    parts = []
+    for path in paths:
+        path = Path(path)
+        if not path.is_file():
+            return None
+        stat = path.stat()
+        parts.append([path.name, stat.st_size, stat.st_mtime_ns])
+    return parts
+
+
+def file_sha256(path, chunk_size=1024**2):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_inputs(paths, root=None):
+    """
+    Content hashes of build inputs, with size/mtime so unchanged files can be
+    verified without rehashing. Paths are stored relative to root when given.
+    """
+    records = []
+    for path in map(Path, paths):
+        stat = path.stat()
+        records.append(
+            {
+                "path": (path.relative_to(root) if root else path).as_posix(),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": file_sha256(path),
+            }
+        )
+    return records
+
+
+def inputs_match(records, root=None):
+    """
+    True if every recorded input still has the same content. Files whose size and
+    mtime are unchanged are trusted; touched files (e.g. a fresh checkout) are rehashed.
+    """
+    for record in records:
+        path = Path(root or "") / record["path"]
+        if not path.is_file():
+            return False
+        stat = path.stat()
+        if stat.st_size != record["size"]:
+            return False
+        if stat.st_mtime_ns == record["mtime_ns"]:
+            continue
+        if file_sha256(path) != record["sha256"]:
+            return False
+    return True
+
+
+def slug(key):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", "__".join(str(k) for k in key))
+
+
+def write_frame(path, df):
+    """
+    Write a DataFrame/GeoDataFrame to (Geo)Parquet. Returns metadata for read_frame.
+    GeoParquet gets a bbox covering column, so read_frame can read spatial windows.
+    """
+    if isinstance(df, gpd.GeoDataFrame):
+        df.to_parquet(path, write_covering_bbox=True)
+    else:
+        df.to_parquet(path)
+    return {"file": Path(path).name, "attrs": df.attrs if _json_safe(df.attrs) else {}}
+
+
+def bbox_filter(bbox, filters=None):
+    """
+    Row filter on the bbox covering column for rows intersecting the window
+    (minx, miny, maxx, maxy), and'ed with any other pyarrow `filters`.
+    """
+    minx, miny, maxx, maxy = bbox
+    expression = (
+        (pc.field("bbox", "xmin") <= maxx)
+        & (pc.field("bbox", "xmax") >= minx)
+        & (pc.field("bbox", "ymin") <= maxy)
+        & (pc.field("bbox", "ymax") >= miny)
+    )
+    if filters is None:
+        return expression
+    if not isinstance(filters, pc.Expression):
+        filters = pq.filters_to_expression(filters)
+    return expression & filters
+
+
+def read_frame(path, meta=None, columns=None, filters=None, bbox=None):
+    """
+    Read a (Geo)Parquet file written by write_frame.
+
+    With a bbox (minx, miny, maxx, maxy), only rows intersecting it are read (by their
+    bounding boxes, through the covering column; files without one are clipped after
+    reading).
+
+    Parquet hands list columns (rgba colors, coordinates) back as numpy arrays,
+    which pydeck can't serialize, so those are turned back into python lists.
+    """
+    schema = pq.read_schema(path)
+    is_geo = b"geo" in (schema.metadata or {})
+    clip = None
+    if bbox is not None and "bbox" in schema.names:
+        filters = bbox_filter(bbox, filters)
+    elif bbox is not None:
+        clip = bbox
+    reader = gpd.read_parquet if is_geo else pd.read_parquet
+    df = reader(path, columns=columns, filters=filters)
+
+    list_cols = [
+        field.name
+        for field in schema
+        if pa.types.is_list(field.type) and field.name in df.columns
+    ]
+    if list_cols:
+        table = pq.read_table(path, columns=list_cols, filters=filters)
+        for col in list_cols:
+            df[col] = table.column(col).to_pylist()
+    df.attrs.update((meta or {}).get("attrs", {}))
+    if clip is not None:
+        df = df[df.intersects(shapely.box(*clip))]
+    return df
+
+
+class DiskCache:
+    """
+    Stores processed frames (or dicts of frames) as (Geo)Parquet under `root`.
+
+    Each entry lives in `<slug(key)>-<digest>/`, where digest hashes the source
+    fingerprint and processing version; writing a new digest removes stale siblings.
+    Values that aren't frames are skipped (memory-only); frames that fail to write
+    are logged as a warning naming the dataset, and also stay memory-only.
+    """
+
+    def __init__(self, root, enabled=True):
+        self.root = Path(root)
+        self.enabled = enabled
+
+    def _entry_dir(self, key, fingerprint):
+        digest = hashlib.sha1(
+            json.dumps([list(map(str, key)), fingerprint], sort_keys=True).encode()
+        ).hexdigest()[:16]
+        return self.root / f"{slug(key)}-{digest}"
+
+    def read(self, key, fingerprint):
+        if not self.enabled or fingerprint is None:
+            return None
+        entry = self._entry_dir(key, fingerprint)
+        manifest_path = entry / "manifest.json"
+        if not manifest_path.is_file():
+            return None
+        try:
+            manifest = json.loads(manifest_path.read_text())
+            frames = {
+                label: read_frame(entry / meta["file"], meta)
+                for label, meta in manifest["frames"].items()
+            }
+        except Exception as e:
+            print(f"Error {e} reading cache entry {entry}, reloading from source")
+            return None
+        return frames if manifest["kind"] == "dict" else frames[_SINGLE_FRAME]
+
+    def write(self, key, fingerprint, value):
+        if not self.enabled or fingerprint is None:
+            return False
+        if isinstance(value, pd.DataFrame):
+            kind, frames = "frame", {_SINGLE_FRAME: value}
+        elif isinstance(value, dict) and all(
+            isinstance(v, pd.DataFrame) for v in value.values()
+        ):
+            kind, frames = "dict", value
+        else:
+            return False
+
+        entry = self._entry_dir(key, fingerprint)
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        try:
+            tmp.mkdir(parents=True)
+            manifest = {"kind": kind, "frames": {}}
+            for i, (label, df) in enumerate(frames.items()):
+                manifest["frames"][label] = write_frame(tmp / f"{i}.parquet", df)
+            (tmp / "manifest.json").write_text(json.dumps(manifest))
+
+            for stale in self.root.glob(f"{slug(key)}-*"):
+                shutil.rmtree(stale, ignore_errors=True)
+            tmp.rename(entry)
+            return True
+        except Exception as e:
+            # a frame parquet can't store (e.g. a mixed-type column) would otherwise
+            # silently reload from source on every cold start
+            logger.warning(
+                "Error %s writing %s to the disk cache (%s), keeping it in memory only",
+                e,
+                key[0],
+                entry,
+            )
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _json_safe(obj):
+    try:
+        json.dumps(obj)
+        return True
+    except TypeError:
+        return False
@@ -5,11 +5,25 @@ Vermont Data App
 Census Utility Functions
 """
 
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import requests
-import streamlit as st
 from bs4 import BeautifulSoup
 
+from app_utils.metrics import compute_metrics, metric_deltas
+
+# Bundled ACS profile variable labels, built by `python build_data.py census-labels`
+ACS_LABELS_YEAR = 2019
+ACS_LABELS_VERSION = "1"
+ACS_LABELS_DIR = Path(__file__).parent.parent / "Data" / "Census"
+
 
 def split_name_col(census_gdf):
     """
@@ -31,9 +45,19 @@ def split_name_col(census_gdf):
     return census_gdf
 
 
-@st.cache_data
-def get_census_cols():
-    r = requests.get("https://api.census.gov/data/2019/acs/acs5/profile/variables.html")
+def census_labels_path(year=ACS_LABELS_YEAR, labels_dir=ACS_LABELS_DIR):
+    return (
+        Path(labels_dir) / f"acs5_profile_labels_{year}.v{ACS_LABELS_VERSION}.parquet"
+    )
+
+
+def scrape_census_cols(year=ACS_LABELS_YEAR):
+    """
+    Download and parse the Census variables page (only used by the build command).
+    """
+    r = requests.get(
+        f"https://api.census.gov/data/{year}/acs/acs5/profile/variables.html"
+    )
     soup = BeautifulSoup(r.content, "html.parser")
 
     # get table headers as keys
@@ -58,22 +82,74 @@ def get_census_cols():
     return df
 
 
-def split_to_cols(s, cols):
-    parts = [p.strip() for p in s.split("!!")]
+def build_census_labels(year=ACS_LABELS_YEAR, labels_dir=ACS_LABELS_DIR):
+    """
+    Scrape the variable labels once, split them into Measure/Category/Subcategory/
+    Variable, and write the bundled Parquet table.
+    """
+    name_df = relabel_census_cols(scrape_census_cols(year))
+    path = census_labels_path(year, labels_dir)
+    for stale in Path(labels_dir).glob(f"acs5_profile_labels_{year}.v*.parquet"):
+        stale.unlink()
+    name_df.to_parquet(path, index=False)
+    return path
+
+
+@lru_cache
+def _census_cols(year, table):
+    if table is not None:
+        df = _census_cols(year, None)
+        return df[df["Name"].str.startswith(f"{table}_")].reset_index(drop=True)
 
-    while len(parts) < len(cols):
-        parts.append("")
+    path = census_labels_path(year)
+    if not path.is_file():
+        raise FileNotFoundError(
+            f"{path} is missing, build it with `python build_data.py census-labels`"
+        )
+    return pq.read_table(path, memory_map=True).to_pandas()
+
+
+def get_census_cols(year=ACS_LABELS_YEAR, table=None):
+    """
+    Relabeled ACS variable table (Name, Label, Measure, Category, Subcategory, Variable),
+    memory-mapped from the bundled Parquet file, which has to be built first (the
+    Census site is only scraped by the build command). Memoized per year and table
+    ("DP04", ...); each call gets its own copy.
+    """
+    return _census_cols(year, table).copy()
 
-    first = parts[0 : len(cols) - 1]
-    second = parts[len(cols) - 1 :]
-    second = [": ".join(second)]
 
-    return first + second
+LABEL_COLUMNS = ["Measure", "Category", "Subcategory", "Variable"]
+
+
+def split_labels(labels, cols=LABEL_COLUMNS):
+    """
+    Split "!!"-separated labels into len(cols) stripped columns: the leading parts
+    one per column, padded with "", and the rest joined with ": " into the last one.
+
+    Vectorized with Arrow string kernels (split, trim, slice, join) over all labels.
+    """
+    n_head = len(cols) - 1
+    parts = pc.split_pattern(pa.array(labels, type=pa.string()), "!!")
+    parts = pa.ListArray.from_arrays(
+        parts.offsets, pc.utf8_trim_whitespace(parts.flatten())
+    )
+
+    head = pc.list_slice(parts, 0, n_head, return_fixed_size_list=True)
+    head = pc.fill_null(head.flatten(), "")
+    # plain arrays, so the frame takes the labels' index instead of aligning to it
+    splits = {
+        col: head.take(np.arange(i, len(head), n_head)).to_numpy(zero_copy_only=False)
+        for i, col in enumerate(cols[:-1])
+    }
+    tail = pc.binary_join(pc.list_slice(parts, n_head), ": ")
+    splits[cols[-1]] = tail.to_numpy(zero_copy_only=False)
+    return pd.DataFrame(splits, index=labels.index)
 
 
 def relabel_census_cols(df):
     # Splits apart the labels so we can filter across them
-    cols = ["Measure", "Category", "Subcategory", "Variable"]
+    cols = LABEL_COLUMNS
 
     # Keep only rows where the label is structured by "!!" (Issues with "Geography" rows)
     df_clean = df[df["Label"].str.contains("!!")].copy()
@@ -81,8 +157,7 @@ def relabel_census_cols(df):
     # Reset index to avoid merging issues
     df_clean.reset_index(drop=True, inplace=True)
 
-    splits = df_clean["Label"].apply(lambda x: list(split_to_cols(x, cols)))
-    splits_df = pd.DataFrame(splits.tolist(), columns=cols)
+    splits_df = split_labels(df_clean["Label"], cols)
 
     # Create the total categories
     splits_df.loc[
@@ -94,35 +169,122 @@ def relabel_census_cols(df):
     return name_df
 
 
+# Compact tidy census: long values with no geometry (see census_geometry for that)
+TIDY_ID_COLUMNS = ["GEOID", "Jurisdiction", "County"]
+
+
+def _repeat_categorical(values, repeats=None, tiles=None):
+    """Categorical column of `values` repeated/tiled without materializing strings."""
+    cat = pd.Categorical(values)
+    codes = cat.codes
+    if repeats is not None:
+        codes = np.repeat(codes, repeats)
+    if tiles is not None:
+        codes = np.tile(codes, tiles)
+    return pd.Categorical.from_codes(codes, cat.categories)
+
+
 def merge_census_cols(name_df, data_gdf):
-    # Melt the gdf into tidy format
-    id_vars = [
-        "GEOID",
-        "geometry",
-        "Jurisdiction",
-        "County",
-    ]
-    data_gdf[id_vars]
-    df_long = data_gdf.melt(
-        id_vars=id_vars,
-        value_vars=data_gdf.columns.difference(id_vars),
-        var_name="Code",
-        value_name="Value",
+    """
+    Long (tidy) table of every labeled variable for every geography: categorical
+    GEOID/Jurisdiction/County and label columns plus a float32 Value.
+
+    Built straight from the wide value matrix instead of melting (which copied the
+    geometry into every row); maps key the census_geometry polygons by GEOID instead
+    (see mapping.polygon_layer_geometry).
+    """
+    labels = name_df.drop_duplicates("Name").set_index("Name")
+    codes = sorted(set(data_gdf.columns).intersection(labels.index))
+    values = (
+        data_gdf[codes].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float32")
     )
+    n_rows = len(data_gdf)
 
-    # Merge to get the right names and drop the cols
-    return pd.merge(left=df_long, right=name_df, left_on="Code", right_on="Name").drop(
-        columns=["Code", "Name", "Label"]
+    tidy = {
+        col: _repeat_categorical(data_gdf[col].to_numpy(), tiles=len(codes))
+        for col in TIDY_ID_COLUMNS
+    }
+    tidy["Value"] = values.T.ravel()
+    labels = labels.loc[codes]
+    for col in LABEL_COLUMNS:
+        tidy[col] = _repeat_categorical(labels[col].to_numpy(), repeats=n_rows)
+    return pd.DataFrame(tidy)
+
+
+ACS_VARIABLE = re.compile(r"DP\d+_\d+P?E")
+
+
+def acs_columns(*dependencies):
+    """
+    Sorted ACS variables ("DP03_0009PE", ...) named anywhere in column lists and
+    metric spec dicts (see app_utils.metrics.Metric).
+    """
+
+    def names(obj):
+        if isinstance(obj, str):
+            return {obj} if ACS_VARIABLE.fullmatch(obj) else set()
+        if isinstance(obj, dict):
+            return set().union(*map(names, obj.values()))
+        if isinstance(obj, (list, tuple)):
+            return set().union(*map(names, obj))
+        return set()
+
+    return sorted(names(list(dependencies)))
+
+
+def census_tables(census_gdf):
+    """Profile tables ("DP02", "DP04", ...) a census frame has columns from."""
+    return sorted(
+        {col.split("_")[0] for col in census_gdf.columns if re.match(r"DP\d+_", col)}
     )
 
 
 def tidy_census(census_gdf):
     # wrapper func to rename codes in func
-    name_df = get_census_cols()
-    name_df = relabel_census_cols(name_df)
+    tables = census_tables(census_gdf)
+    name_df = pd.concat(
+        [get_census_cols(table=table) for table in tables] or [get_census_cols()],
+        ignore_index=True,
+    )
     return merge_census_cols(name_df, census_gdf)
 
 
+def census_geometry(census_gdf):
+    """
+    One geometry per GEOID, shared by every tidy table.
+    """
+    return (
+        census_gdf[["GEOID", "geometry"]]
+        .drop_duplicates("GEOID")
+        .reset_index(drop=True)
+    )
+
+
+def display_values(values):
+    """
+    float32 values as the float64 they were written as (45.3, not 45.29999923706055),
+    for the handful of rows that get plotted or shown in tooltips.
+    """
+    return pd.Series(
+        [float(str(v)) for v in np.asarray(values, dtype="float32")],
+        index=values.index,
+        dtype="float64",
+    )
+
+
+def combine_tidy_census(dfs):
+    """
+    Concatenate tidy census frames, keeping categorical columns categorical
+    (a plain concat falls back to object when the categories differ).
+    """
+    combined = pd.concat(dfs, ignore_index=True, sort=False)
+    for col in dfs[0].columns[dfs[0].dtypes == "category"]:
+        combined[col] = pd.api.types.union_categoricals(
+            [df[col] for df in dfs], sort_categories=True
+        )
+    return combined
+
+
 def get_geography_title(selected_values):
     county, jurisdiction = selected_values["County"], selected_values["Jurisdiction"]
     county, jurisdiction = county[0], jurisdiction[0]
@@ -136,151 +298,48 @@ def get_geography_title(selected_values):
     return title_geo
 
 
+DELTA_BASELINES = {
+    "2013 Local Data (10-Year Change)": 2013,
+    "2023 Vermont Statewide Averages": "statewide",
+}
+# deltas the old per-baseline code didn't report
+DELTA_OMITTED = {
+    2013: ["avg_med_val"],
+    "statewide": [
+        "total_units",
+        "vacant_units",
+        "occupied_units",
+        "owned_units",
+        "rented_units",
+        "rent_burden35",
+    ],
+}
+
+
 def calculate_delta_values(filtered_gdf_2023, baseline, filtered_gdf_2013, housing_gdf):
-    ##TODO simplify this logic into something that can handle whatever data is thrown at it.
-    if baseline == "2013 Local Data (10-Year Change)":
-        total_units_2023 = filtered_gdf_2023["DP04_0001E"].sum()
-        total_units_2013 = filtered_gdf_2013["DP04_0001E"].sum()
-        total_units_delta = total_units_2023 - total_units_2013
-
-        vacant_units_2023 = filtered_gdf_2023["DP04_0003E"].sum()
-        vacant_units_2013 = filtered_gdf_2013["DP04_0003E"].sum()
-        pct_vac_2023 = (vacant_units_2023 / total_units_2023) * 100
-        pct_vac_2013 = (vacant_units_2013 / total_units_2013) * 100
-        vacant_units_delta = vacant_units_2023 - vacant_units_2013
-        pct_vac_delta = pct_vac_2023 - pct_vac_2013
-
-        occupied_units_2023 = filtered_gdf_2023["DP04_0002E"].sum()
-        occupied_units_2013 = filtered_gdf_2013["DP04_0002E"].sum()
-        pct_occ_2023 = (occupied_units_2023 / total_units_2023) * 100
-        pct_occ_2013 = (occupied_units_2013 / total_units_2013) * 100
-        occupied_units_delta = occupied_units_2023 - occupied_units_2013
-        pct_occ_delta = pct_occ_2023 - pct_occ_2013
-
-        owned_units_2023 = filtered_gdf_2023["DP04_0046E"].sum()
-        owned_units_2013 = filtered_gdf_2013["DP04_0045E"].sum()
-        pct_own_2023 = (owned_units_2023 / occupied_units_2023) * 100
-        pct_own_2013 = (owned_units_2013 / occupied_units_2013) * 100
-        owned_units_delta = owned_units_2023 - owned_units_2013
-        pct_own_delta = pct_own_2023 - pct_own_2013
-
-        # Renter-Occupied Units
-        rented_units_2023 = filtered_gdf_2023["DP04_0047E"].sum()
-        rented_units_2013 = filtered_gdf_2013["DP04_0046E"].sum()
-        pct_rent_2023 = (rented_units_2023 / occupied_units_2023) * 100
-        pct_rent_2013 = (rented_units_2013 / occupied_units_2013) * 100
-        rented_units_delta = rented_units_2023 - rented_units_2013
-        pct_rent_delta = pct_rent_2023 - pct_rent_2013
-
-        # Average Median Monthly Owner Cost (SMOC) (For units with a mortgage)
-        avg_med_SMOC_2023 = filtered_gdf_2023["DP04_0101E"].mean()
-        avg_med_SMOC_2013 = filtered_gdf_2013["DP04_0100E"].mean()
-        avg_med_SMOC_delta = avg_med_SMOC_2023 - avg_med_SMOC_2013
-
-        avg_med_SMOC2_2023 = filtered_gdf_2023["DP04_0109E"].mean()
-        avg_med_SMOC2_2013 = filtered_gdf_2013["DP04_0107E"].mean()
-        avg_med_SMOC2_delta = avg_med_SMOC2_2023 - avg_med_SMOC2_2013
-
-        # Average Median Gross Rent
-        avg_med_gross_rent_2023 = filtered_gdf_2023["DP04_0134E"].mean()
-        avg_med_gross_rent_2013 = filtered_gdf_2013["DP04_0132E"].mean()
-        avg_med_gross_rent_delta = avg_med_gross_rent_2023 - avg_med_gross_rent_2013
-
-        units_paying_rent_2023 = filtered_gdf_2023["DP04_0126E"].sum()
-        units_paying_rent_2013 = filtered_gdf_2013["DP04_0124E"].sum()
-        rent_burden35_2023 = filtered_gdf_2023["DP04_0142E"].sum()
-        rent_burden35_2013 = filtered_gdf_2013["DP04_0140E"].sum()
-        rent_burden35_pct_2023 = (rent_burden35_2023 / units_paying_rent_2023) * 100
-        rent_burden35_pct_2013 = (rent_burden35_2013 / units_paying_rent_2013) * 100
-        rent_burden35_delta = rent_burden35_2023 - rent_burden35_2013
-        rent_burden35_pct_delta = rent_burden35_pct_2023 - rent_burden35_pct_2013
-
-    elif baseline == "2023 Vermont Statewide Averages":
-        total_units_2023 = filtered_gdf_2023["DP04_0001E"].sum()
-        total_units_state = housing_gdf["DP04_0001E"].sum()
-
-        occupied_units_2023 = filtered_gdf_2023["DP04_0002E"].sum()
-        occupied_units_state = housing_gdf["DP04_0002E"].sum()
-        pct_occ_2023 = (occupied_units_2023 / total_units_2023) * 100
-        pct_occ_state = (occupied_units_state / total_units_state) * 100
-        pct_occ_delta = pct_occ_2023 - pct_occ_state
-
-        vacant_units_2023 = filtered_gdf_2023["DP04_0003E"].sum()
-        pct_vac_2023 = (vacant_units_2023 / total_units_2023) * 100
-        vacant_units_state = housing_gdf["DP04_0003E"].sum()
-        pct_vac_state = (vacant_units_state / total_units_state) * 100
-        pct_vac_delta = pct_vac_2023 - pct_vac_state
-
-        # Owner-Occupied Units
-        owned_units_2023 = filtered_gdf_2023["DP04_0046E"].sum()
-        owned_units_state = housing_gdf["DP04_0046E"].sum()
-        pct_own_2023 = (owned_units_2023 / occupied_units_2023) * 100
-        pct_own_state = (owned_units_state / occupied_units_state) * 100
-        pct_own_delta = pct_own_2023 - pct_own_state
-
-        # Renter-Occupied Units
-        rented_units_2023 = filtered_gdf_2023["DP04_0047E"].sum()
-        rented_units_state = housing_gdf["DP04_0047E"].sum()
-        pct_rent_2023 = (rented_units_2023 / occupied_units_2023) * 100
-        pct_rent_state = (rented_units_state / occupied_units_state) * 100
-        pct_rent_delta = pct_rent_2023 - pct_rent_state
-
-        avg_med_val_2023 = filtered_gdf_2023["DP04_0089E"].mean()
-        avg_med_val_state = housing_gdf["DP04_0089E"].mean()
-        avg_med_val_delta = avg_med_val_2023 - avg_med_val_state
-
-        # Average Median Monthly Owner Cost (SMOC) (For units with a mortgage)
-        avg_med_SMOC_2023 = filtered_gdf_2023["DP04_0101E"].mean()
-        avg_med_SMOC_state = housing_gdf["DP04_0101E"].mean()
-        avg_med_SMOC_delta = avg_med_SMOC_2023 - avg_med_SMOC_state
-
-        # Average Median Monthly Owner Cost (SMOC) (For units without a mortgage)
-        avg_med_SMOC2_2023 = filtered_gdf_2023["DP04_0109E"].mean()
-        avg_med_SMOC2_state = housing_gdf["DP04_0109E"].mean()
-        avg_med_SMOC2_delta = avg_med_SMOC2_2023 - avg_med_SMOC2_state
-
-        # Average Median Gross Rent
-        avg_med_gross_rent_2023 = filtered_gdf_2023["DP04_0134E"].mean()
-        avg_med_gross_rent_state = housing_gdf["DP04_0134E"].mean()
-        avg_med_gross_rent_delta = avg_med_gross_rent_2023 - avg_med_gross_rent_state
-
-        # Count of Households where rent takes up 35% or more of their household income
-        units_paying_rent_2023 = filtered_gdf_2023["DP04_0126E"].sum()
-        units_paying_rent_state = housing_gdf["DP04_0126E"].sum()
-        rent_burden35_2023 = filtered_gdf_2023["DP04_0142E"].sum()
-        rent_burden35_state = housing_gdf["DP04_0142E"].sum()
-        rent_burden35_pct_2023 = (rent_burden35_2023 / units_paying_rent_2023) * 100
-        rent_burden35_pct_state = (rent_burden35_state / units_paying_rent_state) * 100
-        rent_burden35_pct_delta = rent_burden35_pct_2023 - rent_burden35_pct_state
-
-    return {
-        "total_units_delta": total_units_delta
-        if baseline == "2013 Local Data (10-Year Change)"
-        else None,
-        "vacant_units_delta": vacant_units_delta
-        if baseline == "2013 Local Data (10-Year Change)"
-        else None,
-        "pct_vac_delta": pct_vac_delta,
-        "occupied_units_delta": occupied_units_delta
-        if baseline == "2013 Local Data (10-Year Change)"
-        else None,
-        "pct_occ_delta": pct_occ_delta,
-        "owned_units_delta": owned_units_delta
-        if baseline == "2013 Local Data (10-Year Change)"
-        else None,
-        "pct_own_delta": pct_own_delta,
-        "rented_units_delta": rented_units_delta
-        if baseline == "2013 Local Data (10-Year Change)"
-        else None,
-        "pct_rent_delta": pct_rent_delta,
-        "avg_med_val_delta": avg_med_val_delta
-        if baseline == "2023 Vermont Statewide Averages"
-        else None,
-        "avg_med_SMOC_delta": avg_med_SMOC_delta,
-        "avg_med_SMOC2_delta": avg_med_SMOC2_delta,
-        "avg_med_gross_rent_delta": avg_med_gross_rent_delta,
-        "rent_burden35_delta": rent_burden35_delta
-        if baseline == "2013 Local Data (10-Year Change)"
-        else None,
-        "rent_burden35_pct_delta": rent_burden35_pct_delta,
-    }
+    """
+    Housing deltas ("<metric>_delta", see HOUSING_DELTA_METRICS) of the filtered 2023
+    frame against the filtered 2013 frame or the statewide 2023 frame.
+
+    Kept for frames filtered by hand; per-geography deltas for any pair of vintages
+    are cached by masterload("census_housing_deltas", current=..., baseline=...).
+    """
+    # imported here, dataset_sources imports this module
+    from app_utils.constants.dataset_sources import housing_delta_metrics
+
+    if baseline not in DELTA_BASELINES:
+        raise ValueError(f"Unknown delta baseline {baseline}")
+    year = DELTA_BASELINES[baseline]
+    if year == "statewide":
+        baseline_df, baseline_specs = housing_gdf, housing_delta_metrics(2023)
+    else:
+        baseline_df, baseline_specs = filtered_gdf_2013, housing_delta_metrics(year)
+
+    current = compute_metrics(filtered_gdf_2023, housing_delta_metrics(2023))
+    baseline_metrics = compute_metrics(baseline_df, baseline_specs)
+    deltas = metric_deltas(
+        pd.DataFrame([current]), pd.DataFrame([baseline_metrics])
+    ).iloc[0]
+    values = {f"{name}_delta": deltas[f"{name}_delta"] for name in current}
+    values.update((f"{name}_delta", None) for name in DELTA_OMITTED[year])
+    return values
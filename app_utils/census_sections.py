@@ -8,28 +8,42 @@ import pydeck as pdk
 import streamlit as st
 from matplotlib import colormaps
 
+from app_utils.census import display_values
+from app_utils.classify import class_rgba, get_breaks, precompute_breaks
 from app_utils.color import (
     TopHoldNorm,
     get_colornorm_stats,
-    jenks_color_map,
     map_outlier_yellow,
+    norm_colors,
     render_colorbar,
 )
+from app_utils.data_loading import masterload
 from app_utils.df_filtering import filter_wrapper
-from app_utils.mapping import add_tooltip_from_dict, map_gdf_single_layer
+from app_utils.mapping import (
+    add_tooltip_from_dict,
+    choropleth_map,
+    polygon_layer_geometry,
+)
 from app_utils.plot import plot_container
 
+MAP_CLASSES = 10
+MAP_FILTER_COLUMNS = ["Category", "Subcategory", "Variable", "Measure"]
+
 
-def fill_census_colors(gdf, map_color):
+def fill_census_colors(gdf, map_color, breaks_key=None, n_classes=MAP_CLASSES):
     """
     Note some of this is uesless because it doesn't matter  (Very well said Fitz    - Ian)
+
+    Jenk's natural breaks are memoized under breaks_key (see classify.get_breaks);
+    values without a class (NaN) are transparent.
     """
     # n_classes = col1.slider(label="Adjust the level of detail", value=10, min_value=5, max_value=15)
-    # Define the Jenk's colormap and apply it to the dataframe
-    jenks_cmap_dict = jenks_color_map(gdf, 10, map_color)
-    gdf["rgba_color"] = gdf["color_groups"].astype(str).map(jenks_cmap_dict)
-    # Fill null values with a transparent color
-    gdf["rgba_color"] = gdf["rgba_color"].fillna("(0, 0, 0, 0)")
+    breaks = get_breaks(breaks_key, gdf["Value"].to_numpy(), n_classes)
+    if not len(breaks):
+        st.warning(
+            "The variable you are trying to map is an invalid measure. Please select another variable."
+        )
+    gdf["rgba_color"] = class_rgba(gdf["Value"].to_numpy(), breaks, map_color).tolist()
 
     ## potential legacy code to use
     # vmin, vmax, cutoff  = get_colornorm_stats(gdf, 5)
@@ -41,25 +55,20 @@ def fill_census_colors(gdf, map_color):
     #     # Option One:  Outliers get the top 10% of the norm (same color, just gradation shifts)
     #     norm = TopHoldNorm(vmin=vmin, vmax=vmax, cutoff=cutoff, outlier_fraction=0.05)
     #     # Convert colors to [R, G, B, A] values
-    #     gdf["fill_color"] = gdf['Value'].apply(
-    #         lambda x: [int(c * 255) for c in cmap(norm(x))[:3]] + [180])
+    #     gdf["fill_color"] = norm_colors(gdf["Value"], cmap, norm).tolist()
     #     render_colorbar(cmap=cmap, norm=norm, vmin=vmin, vmax=vmax, cutoff=cutoff, style=style)
 
     # elif style == "Yellow":
     #     # Option Two: Outliers get a separate color (yellow)
     #     norm = colors.Normalize(vmin=vmin, vmax=cutoff, clip=False)
-    #     gdf["fill_color"] = gdf["Value"].apply(
-    #         lambda x: map_outlier_yellow(x, cmap, norm, cutoff))
+    #     gdf["fill_color"] = map_outlier_yellow(gdf["Value"], cmap, norm, cutoff).tolist()
     #     render_colorbar(cmap=cmap, norm=norm, vmin=vmin, vmax=vmax, cutoff=cutoff, style=style)
     return gdf
 
 
-def process_census_data(gdf, selected_values, map_color):
-    gdf = fill_census_colors(gdf, map_color)
+def process_census_data(gdf, selected_values, map_color, breaks_key=None):
+    gdf = fill_census_colors(gdf, map_color, breaks_key)
     gdf = add_census_tooltip(gdf, selected_values)
-    gdf["coordinates"] = gdf.geometry.apply(
-        lambda geom: geom.__geo_interface__["coordinates"]
-    )
     return gdf
 
 
@@ -67,24 +76,41 @@ def add_census_tooltip(gdf, selected_values):
     ## hardcode a string to callout the variable we're mapping
     tooltip_fmt = f"{selected_values['Variable']} {selected_values['Measure']}".upper()
     return add_tooltip_from_dict(
-        gdf, label_to_col={"Municipality": "Jurisdiction", tooltip_fmt: "Value"}
+        gdf,
+        label_to_col={"Municipality": "Jurisdiction", tooltip_fmt: "Value"},
+        lazy=True,
     )
 
 
-def mapping_tab(data, map_color="Reds"):
+def mapping_tab(data, map_color="Reds", cache_key=None):
+    """
+    Choropleth of one census variable. Pass a cache_key naming the dataset (e.g.
+    "housing") to memoize the class breaks of each selection.
+    """
     st.subheader("Mapping")
 
+    # breaks for every variable are filled in the background while this one renders
+    if cache_key is not None:
+        precompute_breaks(cache_key, data, MAP_FILTER_COLUMNS, MAP_CLASSES)
+
     ## filter down to column to map
     filter_state = filter_wrapper(
         df=data,
-        filter_columns=["Category", "Subcategory", "Variable", "Measure"],
+        filter_columns=MAP_FILTER_COLUMNS,
         key_prefix="mapping_filter_2023",
         style="selectbox",
     )
+    breaks_key = None if cache_key is None else (cache_key, filter_state.cache_key())
 
+    # one row per town; the town polygons are encoded once on the server and reused
+    # by every map (the browser still receives them with each one).
+    # Colors come from the stored float32 values, the same ones precompute_breaks
+    # classifies, and only the tooltip gets the display values.
+    filtered_2023 = filter_state.apply_filters(data)
     filtered_2023 = process_census_data(
-        filter_state.apply_filters(data), filter_state.selections, map_color
+        filtered_2023, filter_state.selections, map_color, breaks_key
     )
+    filtered_2023["Value"] = display_values(filtered_2023["Value"])
 
     # Normalize the housing variable for monochromatic chloropleth coloring
     vmin, vmax, cutoff = get_colornorm_stats(filtered_2023, 5)
@@ -100,9 +126,9 @@ def mapping_tab(data, map_color="Reds"):
         # Option One:  Outliers get the top 10% of the norm (same color, just gradation shifts)
         norm = TopHoldNorm(vmin=vmin, vmax=vmax, cutoff=cutoff, outlier_fraction=0.05)
         # Convert colors to [R, G, B, A] values
-        filtered_2023["fill_color"] = filtered_2023["Value"].apply(
-            lambda x: [int(c * 255) for c in cmap(norm(x))[:3]] + [180]
-        )
+        filtered_2023["fill_color"] = norm_colors(
+            filtered_2023["Value"], cmap, norm
+        ).tolist()
         render_colorbar(
             cmap=cmap, norm=norm, vmin=vmin, vmax=vmax, cutoff=cutoff, style=style
         )
@@ -110,28 +136,22 @@ def mapping_tab(data, map_color="Reds"):
     elif style == "Yellow":
         # Option Two: Outliers get a separate color (yellow)
         norm = colors.Normalize(vmin=vmin, vmax=cutoff, clip=False)
-        filtered_2023["fill_color"] = filtered_2023["Value"].apply(
-            lambda x: map_outlier_yellow(x, cmap, norm, cutoff)
-        )
+        filtered_2023["fill_color"] = map_outlier_yellow(
+            filtered_2023["Value"], cmap, norm, cutoff
+        ).tolist()
         render_colorbar(
             cmap=cmap, norm=norm, vmin=vmin, vmax=vmax, cutoff=cutoff, style=style
         )
 
     elif style == "Jenk's Natural Breaks":
         # Option Three: Jenk's Natural Breaks Algorithm
-        n_classes = 10
-        # n_classes = col1.slider(label="Adjust the level of detail", value=10, min_value=5, max_value=15)
-        # Define the Jenk's colormap and apply it to the dataframe
-        jenks_cmap_dict = jenks_color_map(filtered_2023, n_classes, map_color)
-        filtered_2023["fill_color"] = (
-            filtered_2023["color_groups"].astype(str).map(jenks_cmap_dict)
-        )
-        # Fill null values with a transparent color
-        filtered_2023["fill_color"] = filtered_2023["fill_color"].fillna("(0, 0, 0, 0)")
+        # (already classified and colored by process_census_data, as rgba_color)
+        pass
 
     # generate and display map
-    map = map_gdf_single_layer(
-        gdf=filtered_2023,
+    map = choropleth_map(
+        filtered_2023,
+        polygon_layer_geometry(masterload("census_geometry")),
         view_state=pdk.ViewState(
             latitude=44.26, longitude=-72.57, min_zoom=6.5, zoom=7
         ),
@@ -183,6 +203,12 @@ def select_dataset(col, data_dict, label_prefix):
     )
     df = df[df["Jurisdiction"].isin(select_juridisdictions_df)]
 
+    # this frame is rebuilt every rerun, so name it for the filter tree cache
+    df.attrs["dataset_key"] = (
+        select_dataset,
+        select_county,
+        tuple(sorted(select_juridisdictions_df)),
+    )
     return df
 
 
@@ -193,7 +219,7 @@ def get_datasets(data_dict, drop_cols, label_prefixes):
     with st.expander("**Filter Datasets**", expanded=True):
         dfs = {
             label: select_dataset(col, data_dict, label_prefix=label).drop(
-                columns=drop_cols
+                columns=drop_cols, errors="ignore"
             )
             for col, label in zip(st.columns(2), label_prefixes, strict=False)
         }
@@ -210,8 +236,14 @@ def render_variable_selectors(dfs, filter_columns):
             key_prefix=f"results{var_i + 1}",
             header=f"#### Variable {var_i + 1}",
             style="selectbox",
+            dataset_key=dfs["Base"].attrs.get("dataset_key"),
         )
-        filtered = {name: filter_state.apply_filters(df) for name, df in dfs.items()}
+        filtered = {
+            name: filter_state.apply_filters(df).assign(
+                Value=lambda d: display_values(d["Value"])
+            )
+            for name, df in dfs.items()
+        }
         selected = filter_state.selections
         flattened_values = [
             ", ".join(v) if isinstance(v, list) else str(v) for v in selected.values()
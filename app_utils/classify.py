@@ -0,0 +1,155 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Choropleth classification for the census maps.
+
+Class breaks are memoized per (dataset, variable selection, n_classes, method) and
+can be precomputed for every variable of a dataset in a background thread. Classes
+map to RGBA through a per-colormap lookup table, so coloring a layer is one take.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import matplotlib.colors as colors
+import numpy as np
+from matplotlib import colormaps
+
+from app_utils.cache import MemoryLRU
+from app_utils.color import hex_to_rgb255
+
+# Jenks is quadratic in the number of values (~35ms at 2k, ~4s at 20k), so larger
+# arrays are classified from a sample of this size unless method="jenks_exact"
+JENKS_MAX_VALUES = 2000
+METHODS = ("jenks", "jenks_exact", "quantile")
+TRANSPARENT = (0, 0, 0, 0)
+
+_BREAKS = MemoryLRU(max_bytes=16 * 1024**2)
+_PRECOMPUTE = ThreadPoolExecutor(max_workers=1, thread_name_prefix="breaks")
+_SCHEDULED = set()
+_SCHEDULED_LOCK = threading.Lock()
+
+
+def compute_breaks(values, n_classes, method="jenks", max_values=JENKS_MAX_VALUES):
+    """
+    Sorted, unique class edges (n_classes + 1 at most) for the non-NaN values.
+
+    "jenks" is exact up to max_values and uses an evenly spaced sample of the sorted
+    values (always keeping the min and max) above that; "quantile" is equal-count.
+    """
+    import jenkspy
+
+    if method not in METHODS:
+        raise ValueError(f"Unknown classification method {method}")
+    values = np.asarray(values, dtype=float)
+    values = np.sort(values[~np.isnan(values)])
+    if not len(values):
+        return np.array([])
+
+    unique = np.unique(values)
+    if len(unique) <= n_classes:
+        # jenkspy needs more distinct values than classes
+        return unique
+    if method == "quantile":
+        breaks = np.quantile(values, np.linspace(0, 1, n_classes + 1))
+    else:
+        if method == "jenks" and len(values) > max_values:
+            values = values[np.linspace(0, len(values) - 1, max_values).astype(int)]
+        breaks = jenkspy.jenks_breaks(values, n_classes=n_classes)
+    return np.unique(breaks)
+
+
+def get_breaks(key, values, n_classes, method="jenks"):
+    """
+    compute_breaks memoized under key, (dataset, FilterState.cache_key()) for the
+    census maps. key=None always computes.
+    """
+    if key is None:
+        return compute_breaks(values, n_classes, method)
+    full_key = (key, n_classes, method)
+    breaks = _BREAKS.get(full_key)
+    if breaks is None:
+        breaks = _BREAKS.put(full_key, compute_breaks(values, n_classes, method))
+    return breaks
+
+
+def classify(values, breaks):
+    """
+    Class of each value, the way pd.cut(values, breaks, include_lowest=True) bins
+    them: (edge_i, edge_i+1], with the lowest edge included. Values outside the
+    edges (e.g. breaks from a sample) go to the end classes. -1 for NaN or no edges.
+    """
+    values = np.asarray(values, dtype=float)
+    if not len(breaks):
+        return np.full(len(values), -1)
+    classes = np.searchsorted(breaks, values, side="left") - 1
+    classes = np.clip(classes, 0, max(len(breaks) - 2, 0))
+    classes[np.isnan(values)] = -1
+    return classes
+
+
+@lru_cache(maxsize=64)
+def class_colors(color, n_classes, alpha=180):
+    """
+    (n_classes + 1, 4) uint8 RGBA lookup table: n_classes evenly spaced colors from
+    the colormap, and a transparent last row so that class -1 indexes to it.
+    """
+    cmap = colormaps[color]
+    lut = np.array(
+        [
+            hex_to_rgb255(colors.to_hex(cmap(val)))[:3] + [alpha]
+            for val in np.linspace(0.1, 0.9, n_classes)
+        ]
+        + [list(TRANSPARENT)],
+        dtype=np.uint8,
+    ).reshape(-1, 4)
+    lut.flags.writeable = False
+    return lut
+
+
+def class_rgba(values, breaks, color, alpha=180):
+    """(N, 4) uint8 RGBA for values classified by breaks."""
+    lut = class_colors(color, max(len(breaks) - 1, 1), alpha)
+    return lut[classify(values, breaks)]
+
+
+def selection_key(columns, values):
+    """FilterState.cache_key() of a selection of one value per column."""
+    return tuple(
+        (col, (str(value),)) for col, value in zip(columns, values, strict=True)
+    )
+
+
+def precompute_breaks(dataset, df, selection_columns, n_classes, method="jenks"):
+    """
+    Fill the breaks cache for every variable selection of a tidy frame (one group
+    of `selection_columns`, classifying "Value") in the background. Each dataset is
+    only scheduled once. Keys are those of the single-value selections in mapping_tab.
+    """
+    job = (dataset, tuple(selection_columns), n_classes, method)
+    with _SCHEDULED_LOCK:
+        if job in _SCHEDULED:
+            return None
+        _SCHEDULED.add(job)
+
+    def run():
+        grouped = df.groupby(list(selection_columns), observed=True, sort=False)
+        for selection, group in grouped["Value"]:
+            key = (dataset, selection_key(selection_columns, selection))
+            full_key = (key, n_classes, method)
+            if full_key in _BREAKS:
+                continue
+            try:
+                _BREAKS.put(full_key, compute_breaks(group, n_classes, method))
+            except Exception as e:
+                print(f"Error {e} precomputing breaks for {dataset} {selection}")
+
+    return _PRECOMPUTE.submit(run)
+
+
+def clear_breaks():
+    _BREAKS.clear()
+    with _SCHEDULED_LOCK:
+        _SCHEDULED.clear()
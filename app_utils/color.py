@@ -13,6 +13,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import streamlit as st
+from matplotlib import colormaps
 from matplotlib.colorbar import ColorbarBase
 
 
@@ -101,53 +102,12 @@ def render_colorbar(cmap, norm, vmin, vmax, cutoff, style, label="Scale"):
     st.image(buf, use_container_width=True)
 
 
-def map_outlier_yellow(x, cmap, norm, cutoff):
-    if x > cutoff:
-        return [255, 255, 0, 180]  # Yellow RGBA
-    rgba = cmap(norm(x))
-    return [int(c * 255) for c in rgba[:3]] + [180]
-
-
-def jenks_color_map(df, n_classes, color):
-    import jenkspy
-    import matplotlib.cm as cm
-    import matplotlib.colors as colors
-    import numpy as np
-
-    # Handle empty or invalid data
-    values = df["Value"].dropna()
-    if values.empty:
-        df["color_groups"] = np.nan
-        st.warning(
-            "The variable you are trying to map is an invalid measure. Please select another variable."
-        )
-        return {}
-
-    # Get Jenks breaks and remove duplicates
-    raw_breaks = jenkspy.jenks_breaks(values, n_classes=n_classes)
-    unique_breaks = sorted(set(raw_breaks))
-
-    # Adjust labels to match number of valid bins
-    actual_classes = len(unique_breaks) - 1
-    group_labels = [f"group_{i + 1}" for i in range(actual_classes)]
-
-    # Assign value groups
-    df["color_groups"] = pd.cut(
-        df["Value"], bins=unique_breaks, labels=group_labels, include_lowest=True
-    )
-
-    # Build color map
-    cmap = cm.get_cmap(color)
-    color_vals = np.linspace(0.1, 0.9, actual_classes)
-    jenks_colors = [colors.to_hex(cmap(val)) for val in color_vals]
-
-    # Map to RGBA using your helper function (assumes it exists)
-    jenks_cmap_dict = {
-        label: hex_to_rgb255(hex_color)
-        for label, hex_color in zip(group_labels, jenks_colors, strict=False)
-    }
-
-    return jenks_cmap_dict
+def map_outlier_yellow(values, cmap, norm, cutoff, alpha=180):
+    """(N, 4) uint8 RGBA of normalized values, with the ones above cutoff in yellow."""
+    values = np.asarray(values, dtype=float)
+    rgba = norm_colors(values, cmap, norm, alpha)
+    rgba[values > cutoff] = OUTLIER_YELLOW
+    return rgba
 
 
 def hex_to_rgb255(hex_color):
@@ -207,6 +167,60 @@ def tab20_rgba(alpha=180):
     ]
 
 
+## Vectorized colors
+# Colors are computed as integer palette codes into a small (n, 4) uint8 RGBA lookup
+# table (or as an (N, 4) uint8 array for continuous scales). Frames store them as
+# lists (rgba_color), the only form pydeck can send from Streamlit.
+OUTLIER_YELLOW = (255, 255, 0, 180)
+MISSING_GREY = (150, 150, 150)
+TRANSPARENT = (0, 0, 0, 0)
+
+
+def palette(cmap, n, alpha=180):
+    """(n, 4) uint8 RGBA: a colormap (name or object) resampled to n colors."""
+    if n == 0:
+        return np.empty((0, 4), dtype=np.uint8)
+    cmap_obj = colormaps[cmap].resampled(n) if isinstance(cmap, str) else cmap
+    lut = cmap_obj(np.arange(n), bytes=True)
+    lut[:, 3] = alpha
+    return lut
+
+
+def color_codes(values, categories, lut, missing=TRANSPARENT):
+    """
+    Palette codes of values among categories (row i of lut is category i), and the
+    lookup table with the missing color appended, which code -1 indexes.
+    """
+    codes = pd.Index(categories).get_indexer(values)
+    lut = np.vstack([np.asarray(lut, dtype=np.uint8).reshape(-1, 4), missing])
+    return codes, lut.astype(np.uint8)
+
+
+def rgba_lists(codes, lut):
+    """
+    rgba_color values for palette codes: one list per lookup table row, shared by
+    every row with that code, so a column costs a take rather than N new lists.
+    """
+    rows = np.empty(len(lut), dtype=object)
+    for i, row in enumerate(lut.tolist()):
+        rows[i] = row
+    return rows[codes]
+
+
+def norm_colors(values, cmap, norm, alpha=180):
+    """(N, 4) uint8 RGBA of values through a norm (e.g. TopHoldNorm) and colormap."""
+    rgba = cmap(norm(np.asarray(values, dtype=float)), bytes=True)
+    rgba[..., 3] = alpha
+    return rgba
+
+
+def mapped_colors(values, color_map, missing=TRANSPARENT):
+    """rgba_color values for values looked up in a {value: rgba} dict."""
+    return rgba_lists(
+        *color_codes(values, list(color_map), list(color_map.values()), missing)
+    )
+
+
 def add_fill_colors(df, column, cmap="tab20", alpha=180):
     """
     Add RGBA fill colors to a DataFrame based on a categorical column.
@@ -218,20 +232,20 @@ def add_fill_colors(df, column, cmap="tab20", alpha=180):
         alpha (int): Alpha value (0–255) to append.
 
     Returns:
-        pd.DataFrame: A copy with a 'fill_color' column (RGBA lists).
+        pd.DataFrame: A copy with 'rgba_color' (RGBA lists) and 'hex_color' columns,
+        grey for missing values.
     """
     df = df.copy()
     unique_keys = sorted(df[column].dropna().unique())
-    cmap_obj = cm.get_cmap(cmap, len(unique_keys)) if isinstance(cmap, str) else cmap
-
-    color_map = {
-        key: [int(255 * c) for c in cmap_obj(i)[:3]] + [alpha]
-        for i, key in enumerate(unique_keys)
-    }
-
-    df["rgba_color"] = df[column].map(
-        lambda k: color_map.get(k, [150, 150, 150, alpha])
+    codes, lut = color_codes(
+        df[column],
+        unique_keys,
+        palette(cmap, len(unique_keys), alpha),
+        missing=(*MISSING_GREY, alpha),
     )
-    df["hex_color"] = df["rgba_color"].apply(lambda k: rgba_to_hex(k))
+
+    df["rgba_color"] = rgba_lists(codes, lut)
+    # hex once per category, then picked by code
+    df["hex_color"] = np.array([rgba_to_hex(row) for row in lut])[codes]
 
     return df
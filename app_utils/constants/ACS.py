@@ -1,3 +1,6 @@
+from app_utils.census import acs_columns
+from app_utils.metrics import Metric, means, sums
+
 ### Paths
 ACS_BASENAME = "https://raw.githubusercontent.com/iansargent/Data-Exploration-Tool-in-Python/refs/heads/main/Data/Census/"
 
@@ -5,24 +8,24 @@ ACS_BASENAME = "https://raw.githubusercontent.com/iansargent/Data-Exploration-To
 ### Variable Titles
 ACS_ECON_METRICS = {
     # Employment
-    "unemployment_rate": lambda df: df["DP03_0009PE"].mean() / 100,
-    "pct_employed": lambda df: df["DP03_0004PE"].mean(),
-    "pct_in_labor_force": lambda df: df["DP03_0002PE"].mean(),
-    "pct_female_in_labor_force": lambda df: df["DP03_0011PE"].mean(),
+    "unemployment_rate": Metric("DP03_0009PE", "mean", scale=0.01),
+    "pct_employed": Metric("DP03_0004PE", "mean"),
+    "pct_in_labor_force": Metric("DP03_0002PE", "mean"),
+    "pct_female_in_labor_force": Metric("DP03_0011PE", "mean"),
     # Healthcare
-    "pct_no_hc_coverage": lambda df: df["DP03_0099PE"].mean(),
-    "pct_no_hc_coverage_u19": lambda df: df["DP03_0101PE"].mean(),
-    "pct_public_hc_coverage": lambda df: df["DP03_0098PE"].mean() / 100,
-    "pct_employed_no_hc_coverage": lambda df: df["DP03_0108PE"].mean(),
+    "pct_no_hc_coverage": Metric("DP03_0099PE", "mean"),
+    "pct_no_hc_coverage_u19": Metric("DP03_0101PE", "mean"),
+    "pct_public_hc_coverage": Metric("DP03_0098PE", "mean", scale=0.01),
+    "pct_employed_no_hc_coverage": Metric("DP03_0108PE", "mean"),
     # Income
-    "income_per_capita": lambda df: df["DP03_0088E"].mean(),
-    "median_family_income": lambda df: df["DP03_0086E"].mean(),
-    "median_earnings": lambda df: df["DP03_0092E"].mean(),
-    "male_earnings": lambda df: df["DP03_0093E"].mean(),
-    "female_earnings": lambda df: df["DP03_0094E"].mean(),
+    "income_per_capita": Metric("DP03_0088E", "mean"),
+    "median_family_income": Metric("DP03_0086E", "mean"),
+    "median_earnings": Metric("DP03_0092E", "mean"),
+    "male_earnings": Metric("DP03_0093E", "mean"),
+    "female_earnings": Metric("DP03_0094E", "mean"),
     # Poverty
-    "pct_people_below_pov": lambda df: df["DP03_0128PE"].mean() / 100,
-    "pct_families_below_pov": lambda df: df["DP03_0119PE"].mean() / 100,
+    "pct_people_below_pov": Metric("DP03_0128PE", "mean", scale=0.01),
+    "pct_families_below_pov": Metric("DP03_0119PE", "mean", scale=0.01),
 }
 
 FAMILY_INCOME_COLUMNS = [
@@ -38,6 +41,8 @@ FAMILY_INCOME_COLUMNS = [
     "DP03_0085E",
 ]
 
+POVERTY_BY_AGE_COLUMNS = ["DP03_0129PE", "DP03_0134PE", "DP03_0135PE"]
+
 FAMILY_INCOME_LABELS = [
     "Under $10,000",
     "$10,000 - $14,999",
@@ -54,37 +59,36 @@ FAMILY_INCOME_LABELS = [
 
 ACS_HOUSING_METRICS = {
     # Basic counts
-    "total_units": lambda df: df["DP04_0001E"].sum(),
-    "vacant_units": lambda df: df["DP04_0003E"].sum(),
-    "occupied_units": lambda df: df["DP04_0002E"].sum(),
+    "total_units": Metric("DP04_0001E"),
+    "vacant_units": Metric("DP04_0003E"),
+    "occupied_units": Metric("DP04_0002E"),
     # Vacancy & occupancy
-    "pct_vacant": lambda df: df["DP04_0003E"].sum() / df["DP04_0001E"].sum(),
-    "pct_occupied": lambda df: df["DP04_0002E"].sum() / df["DP04_0001E"].sum(),
+    "pct_vacant": Metric("DP04_0003E", per="DP04_0001E"),
+    "pct_occupied": Metric("DP04_0002E", per="DP04_0001E"),
     # Tenure
-    "owned_units": lambda df: df["DP04_0046E"].sum(),
-    "rented_units": lambda df: df["DP04_0047E"].sum(),
-    "pct_owned": lambda df: df["DP04_0046E"].sum() / df["DP04_0002E"].sum(),
-    "pct_rented": lambda df: df["DP04_0047E"].sum() / df["DP04_0002E"].sum(),
+    "owned_units": Metric("DP04_0046E"),
+    "rented_units": Metric("DP04_0047E"),
+    "pct_owned": Metric("DP04_0046E", per="DP04_0002E"),
+    "pct_rented": Metric("DP04_0047E", per="DP04_0002E"),
     # Monthly ownership & rent costs
-    "avg_SMOC_mortgaged": lambda df: df["DP04_0101E"].mean(),
-    "avg_SMOC_non_mortgaged": lambda df: df["DP04_0109E"].mean(),
-    "avg_gross_rent": lambda df: df["DP04_0134E"].mean(),
+    "avg_SMOC_mortgaged": Metric("DP04_0101E", "mean"),
+    "avg_SMOC_non_mortgaged": Metric("DP04_0109E", "mean"),
+    "avg_gross_rent": Metric("DP04_0134E", "mean"),
     # Rent burden
-    "units_paying_rent": lambda df: df["DP04_0126E"].sum(),
-    "rent_burden35": lambda df: df["DP04_0142E"].sum(),
-    "pct_rent_burden35": lambda df: (df["DP04_0142E"].sum() / df["DP04_0126E"].sum())
-    * 100,
+    "units_paying_rent": Metric("DP04_0126E"),
+    "rent_burden35": Metric("DP04_0142E"),
+    "pct_rent_burden35": Metric("DP04_0142E", scale=100, per="DP04_0126E"),
     # Units by structure type
-    "one_unit_detached": lambda df: df["DP04_0007E"].sum(),
-    "one_unit_attached": lambda df: df["DP04_0008E"].sum(),
-    "one_unit_total": lambda df: df["DP04_0007E"].sum() + df["DP04_0008E"].sum(),
-    "two_units": lambda df: df["DP04_0009E"].sum(),
-    "three_or_four_units": lambda df: df["DP04_0010E"].sum(),
-    "five_to_nine_units": lambda df: df["DP04_0011E"].sum(),
-    "ten_to_nineteen_units": lambda df: df["DP04_0012E"].sum(),
-    "twenty_or_more_units": lambda df: df["DP04_0013E"].sum(),
-    "mobile_home": lambda df: df["DP04_0014E"].sum(),
-    "boat_rv_van_etc": lambda df: df["DP04_0015E"].sum(),
+    "one_unit_detached": Metric("DP04_0007E"),
+    "one_unit_attached": Metric("DP04_0008E"),
+    "one_unit_total": Metric(("DP04_0007E", "DP04_0008E")),
+    "two_units": Metric("DP04_0009E"),
+    "three_or_four_units": Metric("DP04_0010E"),
+    "five_to_nine_units": Metric("DP04_0011E"),
+    "ten_to_nineteen_units": Metric("DP04_0012E"),
+    "twenty_or_more_units": Metric("DP04_0013E"),
+    "mobile_home": Metric("DP04_0014E"),
+    "boat_rv_van_etc": Metric("DP04_0015E"),
 }
 
 HOUSING_YEAR_LABELS = [
@@ -118,44 +122,43 @@ POPULATION_YEAR_LABELS = [1930, 1940, 1950, 1960, 1970, 1980, 1990, 2000, 2010,
 
 ACS_DEMOGRAPHIC_METRICS = {
     # Basic counts
-    "total_population": lambda df: df["DP05_0001E"].sum(),
+    "total_population": Metric("DP05_0001E"),
     # Sex
-    "pop_male": lambda df: df["DP05_0002E"].sum(),
-    "pct_male": lambda df: df["DP05_0002PE"].mean(),
-    "pop_female": lambda df: df["DP05_0003E"].sum(),
-    "pct_female": lambda df: df["DP05_0003PE"].mean(),
-    "sex_ratio": lambda df: df["DP05_0004E"].mean(),
+    "pop_male": Metric("DP05_0002E"),
+    "pct_male": Metric("DP05_0002PE", "mean"),
+    "pop_female": Metric("DP05_0003E"),
+    "pct_female": Metric("DP05_0003PE", "mean"),
+    "sex_ratio": Metric("DP05_0004E", "mean"),
     # Age
-    "pct_pop_under_18": lambda df: df["DP05_0019PE"].mean(),
-    "pct_pop_65_and_over": lambda df: df["DP05_0024PE"].mean(),
-    "median_age": lambda df: df["DP05_0018E"].mean(),
-    "dependency_ratio": lambda df: (
+    "pct_pop_under_18": Metric("DP05_0019PE", "mean"),
+    "pct_pop_65_and_over": Metric("DP05_0024PE", "mean"),
+    "median_age": Metric("DP05_0018E", "mean"),
+    "dependency_ratio": Metric(
         # Dependents
         (
-            df["DP05_0005E"].sum()  # Under 5 years
-            + df["DP05_0006E"].sum()  # 5 to 9 years
-            + df["DP05_0007E"].sum()  # 10 to 14 years
-            + df["DP05_0015E"].sum()  # 65 to 74 years
-            + df["DP05_0016E"].sum()  # 75 to 84 years
-            + df["DP05_0017E"].sum()  # 85+ years
-        )
-        /
+            "DP05_0005E",  # Under 5 years
+            "DP05_0006E",  # 5 to 9 years
+            "DP05_0007E",  # 10 to 14 years
+            "DP05_0015E",  # 65 to 74 years
+            "DP05_0016E",  # 75 to 84 years
+            "DP05_0017E",  # 85+ years
+        ),
+        scale=100,
         # Working Age
-        (
-            df["DP05_0008E"].sum()  # 15 to 19 years
-            + df["DP05_0009E"].sum()  # 20 to 24 years
-            + df["DP05_0010E"].sum()  # 25 to 34 years
-            + df["DP05_0011E"].sum()  # 35 to 44 years
-            + df["DP05_0012E"].sum()  # 45 to 54 years
-            + df["DP05_0013E"].sum()  # 55 to 59 years
-            + df["DP05_0014E"].sum()  # 60 to 64 years
-        )
-    )
-    * 100,
+        per=(
+            "DP05_0008E",  # 15 to 19 years
+            "DP05_0009E",  # 20 to 24 years
+            "DP05_0010E",  # 25 to 34 years
+            "DP05_0011E",  # 35 to 44 years
+            "DP05_0012E",  # 45 to 54 years
+            "DP05_0013E",  # 55 to 59 years
+            "DP05_0014E",  # 60 to 64 years
+        ),
+    ),
     # Voting-age citizens
-    "pop_voting_age_citizen": lambda df: df["DP05_0087E"].sum(),
-    "citizen_voting_age_pct_male": lambda df: df["DP05_0088PE"].mean(),
-    "citizen_voting_age_pct_female": lambda df: df["DP05_0089PE"].mean(),
+    "pop_voting_age_citizen": Metric("DP05_0087E"),
+    "citizen_voting_age_pct_male": Metric("DP05_0088PE", "mean"),
+    "citizen_voting_age_pct_female": Metric("DP05_0089PE", "mean"),
 }
 
 AGE_GROUP_LABELS = [
@@ -204,5 +207,70 @@ RACE_COLUMNS = [
 
 
 ACS_SOCIAL_METRICS = {
-    "example": lambda df: df["DP02_0001E"].sum(),
+    "example": Metric("DP02_0001E"),
+}
+
+
+### Snapshot metrics
+# Everything each snapshot reads from its frame (metrics and plot columns), computed
+# in one aggregation pass per geography level by app_utils.metrics
+ECON_SNAPSHOT_METRICS = {
+    **ACS_ECON_METRICS,
+    **sums(FAMILY_INCOME_COLUMNS),
+    **means(POVERTY_BY_AGE_COLUMNS),
+}
+HOUSING_SNAPSHOT_METRICS = {**ACS_HOUSING_METRICS, **sums(NEW_HOUSING_UNIT_COLUMNS)}
+DEMOGRAPHIC_SNAPSHOT_METRICS = {
+    **ACS_DEMOGRAPHIC_METRICS,
+    **sums(AGE_GROUP_COLUMNS),
+    **sums(RACE_COLUMNS),
+}
+SOCIAL_SNAPSHOT_METRICS = ACS_SOCIAL_METRICS
+
+
+### Snapshot column dependencies
+# ACS variables each snapshot frame reads. The snapshot loaders project the source
+# FGBs down to these, plus GEOID and the County/Jurisdiction names.
+SNAPSHOT_COLUMNS = {
+    "econ_2023": acs_columns(ECON_SNAPSHOT_METRICS),
+    "housing_2023": acs_columns(HOUSING_SNAPSHOT_METRICS),
+    "demogs_2023": acs_columns(DEMOGRAPHIC_SNAPSHOT_METRICS),
+    "social_2023": acs_columns(SOCIAL_SNAPSHOT_METRICS),
+}
+
+
+### Housing comparisons (deltas against an older vintage or the statewide figures)
+# Defined with 2023 variable codes; older vintages are read through ACS_CROSSWALK.
+HOUSING_DELTA_METRICS = {
+    "total_units": Metric("DP04_0001E"),
+    "vacant_units": Metric("DP04_0003E"),
+    "pct_vac": Metric("DP04_0003E", scale=100, per="DP04_0001E"),
+    "occupied_units": Metric("DP04_0002E"),
+    "pct_occ": Metric("DP04_0002E", scale=100, per="DP04_0001E"),
+    "owned_units": Metric("DP04_0046E"),
+    "pct_own": Metric("DP04_0046E", scale=100, per="DP04_0002E"),
+    "rented_units": Metric("DP04_0047E"),
+    "pct_rent": Metric("DP04_0047E", scale=100, per="DP04_0002E"),
+    "avg_med_val": Metric("DP04_0089E", "mean"),
+    # SMOC with and without a mortgage
+    "avg_med_SMOC": Metric("DP04_0101E", "mean"),
+    "avg_med_SMOC2": Metric("DP04_0109E", "mean"),
+    "avg_med_gross_rent": Metric("DP04_0134E", "mean"),
+    "rent_burden35": Metric("DP04_0142E"),
+    "rent_burden35_pct": Metric("DP04_0142E", scale=100, per="DP04_0126E"),
+}
+
+# Variables renumbered since an older ACS vintage: {year: {2023 code: that year's code}}
+# Codes not listed are the same in both. Add a year here when its tables are added.
+ACS_CROSSWALK = {
+    2023: {},
+    2013: {
+        "DP04_0046E": "DP04_0045E",  # owner-occupied
+        "DP04_0047E": "DP04_0046E",  # renter-occupied
+        "DP04_0101E": "DP04_0100E",  # median SMOC, with a mortgage
+        "DP04_0109E": "DP04_0107E",  # median SMOC, without a mortgage
+        "DP04_0126E": "DP04_0124E",  # occupied units paying rent
+        "DP04_0134E": "DP04_0132E",  # median gross rent
+        "DP04_0142E": "DP04_0140E",  # GRAPI 35.0 percent or more
+    },
 }
@@ -1,35 +1,100 @@
-from app_utils.census import tidy_census
+from dataclasses import dataclass
 
+from app_utils.census import DELTA_OMITTED, acs_columns, tidy_census
+from app_utils.constants.ACS import (
+    ACS_CROSSWALK,
+    HOUSING_DELTA_METRICS,
+    SNAPSHOT_COLUMNS,
+)
+from app_utils.metrics import crosswalk_metrics
+
+
+@dataclass(frozen=True)
+class ProjectedSource:
+    """
+    A census file read with only `columns` (plus NAME, for County/Jurisdiction),
+    without geometry unless asked for.
+    """
+
+    file: str
+    columns: tuple
+    geometry: bool = False
+
+
+def snapshot_source(file, label):
+    return ProjectedSource(file, ("GEOID", *SNAPSHOT_COLUMNS[label]))
+
+
+# Full tables, tidied for mapping and comparison
 ECON_SOURCES = {
-    "econ_2023": "VT_ECONOMIC_ALL.fgb",
     "econ_2023_tidy": ("VT_ECONOMIC_ALL.fgb", tidy_census),
-    "unemployment": "unemployment_rate_by_year.csv",
-    "median_earnings": "median_earnings_by_year.csv",
-    "commute_time": "commute_time_by_year.csv",
-    "commute_habits": "commute_habits_by_year.csv",
 }
 
 HOUSING_SOURCES = {
-    "housing_2023": "VT_HOUSING_ALL.fgb",
     "housing_2023_tidy": ("VT_HOUSING_ALL.fgb", tidy_census),
-    "housing_2013": "VT_HOUSING_ALL_2013.fgb",
     "housing_2013_tidy": ("VT_HOUSING_ALL_2013.fgb", tidy_census),
-    "median_value": "med_home_value_by_year.csv",
-    "median_smoc": "med_smoc_by_year.csv",
-    "vt_historic_population": "VT_Historic_Population.csv",
 }
 
 DEMO_SOURCES = {
-    "demogs_2023": "VT_DEMOGRAPHIC_ALL.fgb",
     "demogs_2023_tidy": ("VT_DEMOGRAPHIC_ALL.fgb", tidy_census),
 }
 
 SOCIAL_SOURCES = {
-    "social_2023": "VT_SOCIAL_ALL.fgb",
     "social_2023_tidy": ("VT_SOCIAL_ALL.fgb", tidy_census),
 }
 
 
+# Snapshot tabs: only the ACS columns declared in SNAPSHOT_COLUMNS, plus the
+# by-year series
+ECON_SNAPSHOT_SOURCES = {
+    "econ_2023": snapshot_source("VT_ECONOMIC_ALL.fgb", "econ_2023"),
+    "unemployment": "unemployment_rate_by_year.csv",
+    "median_earnings": "median_earnings_by_year.csv",
+    "commute_time": "commute_time_by_year.csv",
+    "commute_habits": "commute_habits_by_year.csv",
+}
+
+HOUSING_SNAPSHOT_SOURCES = {
+    "housing_2023": snapshot_source("VT_HOUSING_ALL.fgb", "housing_2023"),
+    "median_value": "med_home_value_by_year.csv",
+    "median_smoc": "med_smoc_by_year.csv",
+    "vt_historic_population": "VT_Historic_Population.csv",
+}
+
+DEMO_SNAPSHOT_SOURCES = {
+    "demogs_2023": snapshot_source("VT_DEMOGRAPHIC_ALL.fgb", "demogs_2023"),
+}
+
+SOCIAL_SNAPSHOT_SOURCES = {
+    "social_2023": snapshot_source("VT_SOCIAL_ALL.fgb", "social_2023"),
+}
+
+
+# Housing tables by ACS vintage, compared through HOUSING_DELTA_METRICS
+HOUSING_VINTAGES = {
+    2023: "VT_HOUSING_ALL.fgb",
+    2013: "VT_HOUSING_ALL_2013.fgb",
+}
+
+
+def housing_delta_metrics(year):
+    """
+    HOUSING_DELTA_METRICS with that vintage's variable codes, leaving out the ones
+    that aren't compared against it (DELTA_OMITTED).
+    """
+    omitted = DELTA_OMITTED.get(year, [])
+    specs = {k: v for k, v in HOUSING_DELTA_METRICS.items() if k not in omitted}
+    return crosswalk_metrics(specs, ACS_CROSSWALK[year])
+
+
+def housing_vintage_source(year):
+    columns = acs_columns(housing_delta_metrics(year))
+    return ProjectedSource(HOUSING_VINTAGES[year], ("GEOID", *columns))
+
+
+# town boundaries shared by all the tidy census tables (joined back on GEOID)
+CENSUS_GEOMETRY_FILE = "VT_HOUSING_ALL.fgb"
+
 COMBINED_CENSUS = {
     "Housing": ("census_housing", "housing_2023_tidy"),
     "Economic": ("census_economics", "econ_2023_tidy"),
@@ -0,0 +1,229 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Streaming conversion of large vector sources (e.g. the FEMA flood GeoJSON) into
+spatially indexed FlatGeobuf or GeoParquet, run offline with
+`python build_data.py convert`.
+
+Features are read in Arrow batches and each batch is filtered, trimmed to the
+needed columns, reprojected and simplified before it's written, so peak memory is
+about one batch regardless of the size of the source.
+"""
+
+import json
+import operator
+from functools import reduce
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pyogrio
+import shapely
+from pyproj import CRS, Transformer
+
+from app_utils.data_loading import (
+    FLOOD_PATH,
+    FLOOD_SOURCE_PATH,
+    FULL_DETAIL_TOLERANCE,
+    soil_converted_path,
+    soil_source_path,
+)
+from app_utils.flooding import FLOOD_COLUMNS
+from app_utils.wastewater import SOIL_RPCS
+
+BATCH_SIZE = 10_000
+GEOMETRY = "geometry"
+
+# name -> source file, converted file (.fgb or .parquet), attribute columns to keep
+# (None for all), {column: value} rows to keep, the output crs and the simplification
+# tolerance (in output crs units)
+CONVERSIONS = {
+    "flood": {
+        "source": FLOOD_SOURCE_PATH,
+        "target": FLOOD_PATH,
+        "columns": FLOOD_COLUMNS,
+        "filters": {"SFHA_TF": "T"},
+        "crs": "EPSG:4326",
+        "simplify": FULL_DETAIL_TOLERANCE,
+    },
+    **{
+        f"soil_{rpc}": {
+            "source": soil_source_path(rpc),
+            "target": soil_converted_path(rpc),
+            "columns": None,
+            "filters": {},
+            "crs": "EPSG:4326",
+            "simplify": FULL_DETAIL_TOLERANCE,
+        }
+        for rpc in SOIL_RPCS.values()
+    },
+}
+
+
+def _reprojector(source_crs, crs):
+    """(N, 2) coordinate transform for shapely.transform, None if the crs matches."""
+    if source_crs is None or CRS(source_crs) == CRS(crs):
+        return None
+    transformer = Transformer.from_crs(source_crs, crs, always_xy=True)
+
+    def reproject(coords):
+        return np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+
+    return reproject
+
+
+def _convert_batches(reader, geometry_name, keep, schema, filters, reproject, simplify):
+    """Filtered, trimmed, reprojected and simplified batches, WKB geometry last."""
+    for batch in reader:
+        if filters:
+            mask = reduce(
+                operator.and_,
+                (pc.equal(batch[col], value) for col, value in filters.items()),
+            )
+            batch = batch.filter(mask)
+        if not batch.num_rows:
+            continue
+        geometry = batch[geometry_name]
+        if reproject is not None or simplify:
+            geoms = shapely.from_wkb(geometry.to_numpy(zero_copy_only=False))
+            if reproject is not None:
+                geoms = shapely.transform(geoms, reproject)
+            if simplify:
+                geoms = shapely.simplify(geoms, simplify, preserve_topology=True)
+            geometry = pa.array(shapely.to_wkb(geoms))
+        yield pa.RecordBatch.from_arrays(
+            [batch[name] for name in keep] + [geometry], schema=schema
+        )
+
+
+def write_fgb(path, schema, batches, crs, geometry_type):
+    """FlatGeobuf with a packed R-tree, written straight from the batch stream."""
+    pyogrio.write_arrow(
+        pa.RecordBatchReader.from_batches(schema, batches),
+        path,
+        driver="FlatGeobuf",
+        geometry_name=GEOMETRY,
+        geometry_type=geometry_type,
+        crs=crs,
+        layer_options={"SPATIAL_INDEX": "YES"},
+    )
+
+
+def write_geoparquet(path, schema, batches, crs, geometry_type):
+    """
+    GeoParquet with one row group per batch and a bbox covering column, so readers
+    can skip row groups outside a bounding box (gpd.read_parquet(bbox=...)).
+    """
+    bbox_type = pa.struct([(k, pa.float64()) for k in ("xmin", "ymin", "xmax", "ymax")])
+    geo = {
+        "version": "1.1.0",
+        "primary_column": GEOMETRY,
+        "columns": {
+            GEOMETRY: {
+                "encoding": "WKB",
+                "geometry_types": [] if geometry_type == "Unknown" else [geometry_type],
+                "crs": CRS(crs).to_json_dict(),
+                "covering": {
+                    "bbox": {k: ["bbox", k] for k in ("xmin", "ymin", "xmax", "ymax")}
+                },
+            }
+        },
+    }
+    schema = schema.append(pa.field("bbox", bbox_type)).with_metadata(
+        {"geo": json.dumps(geo)}
+    )
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            bounds = shapely.bounds(
+                shapely.from_wkb(batch[GEOMETRY].to_numpy(zero_copy_only=False))
+            )
+            bbox = pa.StructArray.from_arrays(list(bounds.T), fields=list(bbox_type))
+            writer.write_batch(
+                pa.RecordBatch.from_arrays([*batch.columns, bbox], schema=schema)
+            )
+
+
+WRITERS = {".fgb": write_fgb, ".parquet": write_geoparquet}
+
+
+def convert(
+    source,
+    target,
+    columns=None,
+    filters=None,
+    crs="EPSG:4326",
+    simplify=None,
+    batch_size=BATCH_SIZE,
+):
+    """
+    Stream `source` (anything OGR reads) into `target`, keeping the rows matching
+    every {column: value} filter and the given attribute columns, reprojected to crs
+    and optionally simplified (tolerance in crs units). The output format follows the
+    target suffix (.fgb or .parquet). Returns the number of rows written.
+    """
+    target = Path(target)
+    if target.suffix not in WRITERS:
+        raise ValueError(
+            f"Can't write {target.suffix} files, use one of {list(WRITERS)}"
+        )
+    filters = filters or {}
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys([*columns, *filters]))
+
+    rows = 0
+
+    def counted(batches):
+        nonlocal rows
+        for batch in batches:
+            rows += batch.num_rows
+            yield batch
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".tmp-{target.name}")
+    with pyogrio.open_arrow(
+        source, columns=read_columns, batch_size=batch_size, use_pyarrow=True
+    ) as (meta, reader):
+        geometry_name = meta["geometry_name"] or "wkb_geometry"
+        keep = [name for name in reader.schema.names if name != geometry_name]
+        if columns is not None:
+            keep = [name for name in columns if name in keep]
+        schema = pa.schema(
+            [reader.schema.field(name) for name in keep]
+            + [pa.field(GEOMETRY, pa.binary())]
+        )
+        batches = _convert_batches(
+            reader,
+            geometry_name,
+            keep,
+            schema,
+            filters,
+            _reprojector(meta["crs"], crs),
+            simplify,
+        )
+        try:
+            WRITERS[target.suffix](
+                tmp, schema, counted(batches), crs, meta["geometry_type"]
+            )
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            raise
+    tmp.replace(target)
+    return rows
+
+
+def convert_source(name, target=None, batch_size=BATCH_SIZE):
+    """Run a registered conversion, optionally to another target (e.g. a .parquet)."""
+    spec = CONVERSIONS[name]
+    return convert(
+        spec["source"],
+        target or spec["target"],
+        columns=spec["columns"],
+        filters=spec["filters"],
+        crs=spec["crs"],
+        simplify=spec["simplify"],
+        batch_size=batch_size,
+    )
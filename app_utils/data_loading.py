@@ -5,32 +5,152 @@ Description: centralized page for data loading
 """
 
 import io
+import json
+import logging
+import os
+import shutil
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import pyogrio
 import requests
+import shapely
 
-from app_utils.census import split_name_col
+from app_utils.cache import (
+    DiskCache,
+    MemoryLRU,
+    fingerprint_files,
+    hash_inputs,
+    inputs_match,
+    read_frame,
+    slug,
+    write_frame,
+)
+from app_utils.census import (
+    census_geometry,
+    census_labels_path,
+    combine_tidy_census,
+    split_name_col,
+)
+from app_utils.constants.ACS import (
+    DEMOGRAPHIC_SNAPSHOT_METRICS,
+    ECON_SNAPSHOT_METRICS,
+    HOUSING_SNAPSHOT_METRICS,
+    SOCIAL_SNAPSHOT_METRICS,
+)
 from app_utils.constants.dataset_sources import (
+    CENSUS_GEOMETRY_FILE,
     COMBINED_CENSUS,
+    DEMO_SNAPSHOT_SOURCES,
     DEMO_SOURCES,
+    ECON_SNAPSHOT_SOURCES,
     ECON_SOURCES,
+    HOUSING_SNAPSHOT_SOURCES,
     HOUSING_SOURCES,
+    HOUSING_VINTAGES,
+    SOCIAL_SNAPSHOT_SOURCES,
     SOCIAL_SOURCES,
+    ProjectedSource,
+    housing_delta_metrics,
+    housing_vintage_source,
 )
 from app_utils.data_cleaning import strip_all_whitespace
-from app_utils.flooding import process_flood_gdf
-from app_utils.mapping import add_cols_of_biggest_intersection
-from app_utils.wastewater import process_soil_data
+from app_utils.flooding import FLOOD_COLUMNS, process_flood_gdf
+from app_utils.metrics import build_rollup, metric_deltas
+from app_utils.spatial_join import EQUAL_AREA_CRS, add_cols_of_biggest_intersection
+from app_utils.wastewater import SOIL_RPCS, process_soil_data
 from app_utils.zoning import process_zoning_data
 
 
 DATADIR = Path(__file__).parent.parent / "Data"
+METRIC_SPECS_PATH = Path(__file__).parent / "constants" / "ACS.py"
+ZONING_PATH = DATADIR / "zoning" / "vt-zoning-update.fgb"
+ZONING_PARTITION_DIR = DATADIR / "zoning" / "partitions"
+FLOOD_SOURCE_PATH = (
+    DATADIR / "large-data" / "Flood_Hazard_Areas_(Only_FEMA_-_digitized_data).geojson"
+)
+# SFHA features of FLOOD_SOURCE_PATH, from `python build_data.py convert flood`
+FLOOD_PATH = DATADIR / "flood-hazard" / "VT_Flood_Hazard.fgb"
+SOIL_DIR = DATADIR / "soil-suitability"
+# Simplification (degrees) of the full-detail geometry the build steps write: the
+# converted flood and soil files and the zoning partitions. Loads don't simplify.
+FULL_DETAIL_TOLERANCE = 0.0001
+CENSUS_DIR = DATADIR / "Census"
+CENSUS_SOURCES = [
+    ECON_SOURCES,
+    HOUSING_SOURCES,
+    DEMO_SOURCES,
+    SOCIAL_SOURCES,
+    ECON_SNAPSHOT_SOURCES,
+    HOUSING_SNAPSHOT_SOURCES,
+    DEMO_SNAPSHOT_SOURCES,
+    SOCIAL_SNAPSHOT_SOURCES,
+]
+JOIN_DIR = DATADIR / "joins"
+
+logger = logging.getLogger(__name__)
+
+# threads for reading independent source files (pyogrio/Arrow release the GIL)
+LOAD_WORKERS = int(os.environ.get("VT_LOAD_WORKERS", 8))
+# seconds spent per source file / derived frame, most recent load
+LOAD_TIMINGS = {}
+
+
+def soil_source_path(rpc):
+    return SOIL_DIR / f"{rpc}_Soil_Septic.fgb"
+
 
-def load_data(path, simplify_tolerance=None, drop_cols=None, postprocess_fn=None):
+def soil_converted_path(rpc):
+    """Simplified soil FGB, from `python build_data.py convert soil_<rpc>`."""
+    return SOIL_DIR / "simplified" / f"{rpc}_Soil_Septic.fgb"
+
+
+def soil_septic_path(rpc):
+    """The converted soil FGB, or the raw one until it's been converted."""
+    converted = soil_converted_path(rpc)
+    return converted if converted.is_file() else soil_source_path(rpc)
+
+
+# strings come back as string[pyarrow] instead of python objects
+ARROW_TO_PANDAS = {
+    "types_mapper": {
+        pa.string(): pd.StringDtype("pyarrow"),
+        pa.large_string(): pd.StringDtype("pyarrow"),
+    }.get
+}
+
+
+def read_csv_arrow(path, columns=None):
+    """
+    Read a CSV with pyarrow's multithreaded reader, optionally only `columns`.
+    Unnamed columns get the same names pandas would give them.
+    """
+    table = pacsv.read_csv(path)
+    table = table.rename_columns(
+        [name or f"Unnamed: {i}" for i, name in enumerate(table.column_names)]
+    )
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas(**ARROW_TO_PANDAS)
+
+
+def load_data(
+    path,
+    simplify_tolerance=None,
+    drop_cols=None,
+    postprocess_fn=None,
+    columns=None,
+    arrow=False,
+    geometry=True,
+    bbox=None,
+):
     """
     General-purpose data loader for CSV or GeoDataFrame.
 
@@ -39,6 +159,12 @@ def load_data(path, simplify_tolerance=None, drop_cols=None, postprocess_fn=None
         simplify_tolerance (float): Optional geometry simplification.
         drop_cols (list): Optional list of columns to drop.
         postprocess_fn (callable): Optional function to apply to the dataframe.
+        columns (list): Optional list of columns to read.
+        geometry (bool): Read the geometry of spatial sources (FGB only).
+        bbox (tuple): Only read features intersecting (minx, miny, maxx, maxy) of a
+            spatial source (uses the FGB spatial index).
+        arrow (bool): Read through Arrow, with string[pyarrow] columns. Whitespace isn't
+            stripped, so the source must be clean (see `python build_data.py clean-census`).
 
     Returns:
         pd.DataFrame or gpd.GeoDataFrame
@@ -47,15 +173,35 @@ def load_data(path, simplify_tolerance=None, drop_cols=None, postprocess_fn=None
 
     match path.suffix.lstrip(".").casefold():
         case "fgb":
-            df = safe_read(lambda: pyogrio.read_dataframe(path))
-            df = crs_set(df)
+            arrow_kwargs = (
+                {"use_arrow": True, "arrow_to_pandas_kwargs": ARROW_TO_PANDAS}
+                if arrow
+                else {}
+            )
+            df = safe_read(
+                lambda: pyogrio.read_dataframe(
+                    path,
+                    columns=columns,
+                    read_geometry=geometry,
+                    bbox=bbox,
+                    **arrow_kwargs,
+                )
+            )
+            if geometry:
+                df = crs_set(df)
         case "geojson":
-            df = safe_read(lambda: gpd.read_file(path))
+            df = safe_read(lambda: gpd.read_file(path, columns=columns, bbox=bbox))
             df = crs_set(df)
+        case "csv" if arrow:
+            df = safe_read(lambda: read_csv_arrow(path, columns))
         case "csv": 
-            df = safe_read(lambda: pd.read_csv(path))
+            df = safe_read(lambda: pd.read_csv(path, usecols=columns))
         case _:
-            df = safe_read(lambda: pd.read_csv(io.StringIO(requests.get(path).text)))
+            df = safe_read(
+                lambda: pd.read_csv(
+                    io.StringIO(requests.get(path).text), usecols=columns
+                )
+            )
 
     if drop_cols:
         df = df.drop(columns=drop_cols, errors="ignore")
@@ -68,8 +214,9 @@ def load_data(path, simplify_tolerance=None, drop_cols=None, postprocess_fn=None
     if postprocess_fn:
         df = postprocess_fn(df)
 
-    df = strip_all_whitespace(df)
-    return df.copy()
+    if not arrow:
+        df = strip_all_whitespace(df)
+    return df
 
 def safe_read(func):
     """
@@ -91,154 +238,834 @@ def crs_set(df):
 ### hard-coded wrappers for particular paths ###
 def load_zoning_data(county=None):
     gdf = load_data(
-        path=DATADIR / "zoning" / "vt-zoning-update.fgb", 
-        simplify_tolerance=0.0001,
+        path=ZONING_PATH,
         drop_cols=["Bylaw Date"],
     )
     return gdf.copy() if not county else gdf[gdf["County"] == county].copy()
 
 
-def load_soil_septic_single(rpc):
+## Partitioned zoning store (built offline by `python build_data.py zoning-partitions`)
+ZONING_INDEX_COLUMNS = [
+    "RPC",
+    "County",
+    "Jurisdiction",
+    "District Name",
+    "District Type",
+    "rgba_color",
+    "hex_color",
+]
+# each district's bounds, stored in the index so spatial windows need no geometry
+ZONING_BOUNDS_COLUMNS = ["minx", "miny", "maxx", "maxy"]
+
+
+def zoning_index_frame(gdf):
+    """The attribute-only index of a processed zoning frame, with district bounds."""
+    return pd.concat(
+        [pd.DataFrame(gdf[ZONING_INDEX_COLUMNS]), gdf.bounds[ZONING_BOUNDS_COLUMNS]],
+        axis=1,
+    )
+
+
+def build_zoning_partitions(out_dir=ZONING_PARTITION_DIR):
+    """
+    Simplify (FULL_DETAIL_TOLERANCE) and process the statewide zoning layer once (so
+    colors stay consistent statewide), then write one GeoParquet file per (RPC, County)
+    plus an attribute-only index used to drive filters without loading any geometry.
+    """
+    gdf = load_zoning_data()
+    gdf["geometry"] = gdf.geometry.simplify(
+        FULL_DETAIL_TOLERANCE, preserve_topology=True
+    )
+    gdf = process_zoning_data(gdf)
+    out_dir = Path(out_dir)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    out_dir.mkdir(parents=True)
+
+    partitions = []
+    for (rpc, county), part in gdf.groupby(["RPC", "County"], dropna=False, sort=True):
+        rpc, county = (None if pd.isna(v) else v for v in (rpc, county))
+        file = Path(slug([rpc])) / f"{slug([county])}.parquet"
+        (out_dir / file.parent).mkdir(exist_ok=True)
+        write_frame(out_dir / file, part.reset_index(drop=True))
+        partitions.append(
+            {
+                "RPC": rpc,
+                "County": county,
+                "file": file.as_posix(),
+                "rows": len(part),
+                "bbox": part.total_bounds.tolist(),
+            }
+        )
+
+    write_frame(out_dir / "index.parquet", zoning_index_frame(gdf))
+    manifest = {
+        "version": PROCESSING_VERSION,
+        "source": fingerprint_files([ZONING_PATH]),
+        "partitions": partitions,
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def zoning_partition_manifest(partition_dir=ZONING_PARTITION_DIR):
+    """
+    The partition manifest, or None if it hasn't been built or is stale
+    (older processing version, or the source FGB changed since the build).
+    """
+    path = Path(partition_dir) / "manifest.json"
+    if not path.is_file():
+        return None
+    manifest = json.loads(path.read_text())
+    if manifest["version"] != PROCESSING_VERSION:
+        return None
+    if ZONING_PATH.exists() and manifest["source"] != fingerprint_files([ZONING_PATH]):
+        return None
+    return manifest
+
+
+def load_zoning_partitions(rpc=None, county=None, partition_dir=ZONING_PARTITION_DIR):
+    """
+    Processed zoning for an RPC and/or Counties (a name or a list of names), reading
+    only the matching partitions. An empty list of Counties gives an empty frame.
+    Falls back to processing the full statewide layer if partitions aren't built.
+    """
+    counties = [county] if isinstance(county, str) else county
+    manifest = zoning_partition_manifest(partition_dir)
+    if manifest is None:
+        gdf = process_zoning_data(load_zoning_data())
+        if rpc is not None:
+            gdf = gdf[gdf["RPC"] == rpc]
+        if counties is not None:
+            gdf = gdf[gdf["County"].isin(counties)]
+        return gdf.reset_index(drop=True)
+
+    files = [
+        p["file"]
+        for p in manifest["partitions"]
+        if (rpc is None or p["RPC"] == rpc)
+        and (counties is None or p["County"] in counties)
+    ]
+    if not files:  # keep the schema for an empty selection
+        return read_frame(Path(partition_dir) / manifest["partitions"][0]["file"]).iloc[:0]
+    return pd.concat(
+        [read_frame(Path(partition_dir) / f) for f in files], ignore_index=True
+    )
+
+
+def load_zoning_index(partition_dir=ZONING_PARTITION_DIR):
+    """
+    Attribute-only zoning table (no geometry) for building filters and legends, with
+    each district's bounds (see zoning_window).
+    """
+    if zoning_partition_manifest(partition_dir) is not None:
+        return read_frame(Path(partition_dir) / "index.parquet")
+    return zoning_index_frame(process_zoning_data(load_zoning_data()))
+
+
+## Spatial windows for bbox= reads of the flood and soil layers
+# windows snap outward to this grid (degrees), so similar selections share a cache entry
+WINDOW_GRID = 0.01
+
+
+def snap_window(bounds, grid=WINDOW_GRID):
+    """(minx, miny, maxx, maxy) rounded outward to the grid, None for empty bounds."""
+    bounds = np.asarray(bounds, dtype=float)
+    if np.isnan(bounds).any():
+        return None
+    low = np.floor(bounds[:2] / grid) * grid
+    high = np.ceil(bounds[2:] / grid) * grid
+    return tuple(round(float(v), 6) for v in (*low, *high))
+
+
+def zoning_window(rpc=None, county=None, jurisdiction=None):
+    """
+    Window around the zoning districts of an RPC / County / Jurisdiction selection
+    (single values or lists), for the bbox= of the flood and soil loaders, from the
+    district bounds in the built zoning index.
+    None (read everything) if the partitions aren't built, since the index would
+    have to be computed from the full statewide layer, or if any selected value
+    isn't in the zoning layer, since the window couldn't cover it.
+    """
+    if zoning_partition_manifest() is None:
+        return None
+    index = masterload("zoning_index")
+    mask = np.ones(len(index), dtype=bool)
+    selection = {"RPC": rpc, "County": county, "Jurisdiction": jurisdiction}
+    for col, values in selection.items():
+        if values is None:
+            continue
+        values = [values] if isinstance(values, str) else list(values)
+        present = index[col].isin(values).to_numpy()
+        if not set(values) <= set(index.loc[present, col]):
+            return None
+        mask &= present
+    if not mask.any():
+        return None
+    bounds = index.loc[mask, ZONING_BOUNDS_COLUMNS].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):  # all-NaN (empty geometry) columns
+        low = np.nanmin(bounds[:, :2], axis=0)
+        high = np.nanmax(bounds[:, 2:], axis=0)
+    return snap_window([*low, *high])
+
+
+def load_soil_septic_single(rpc, bbox=None, columns=None, geometry=True):
     try: 
         return load_data(
-            path= DATADIR / "soil-suitability" / f"{rpc}_Soil_Septic.fgb",
-            simplify_tolerance=0.0001,
+            path=soil_septic_path(rpc),
+            columns=columns,
+            geometry=geometry,
+            bbox=bbox,
         )
     except:
         import streamlit as st
         st.markdown("There is no wastewater soil suitability for that RPC at this time", unsafe_allow_html=True)
         st.stop()
 
+# soil attributes the Wastewater filters read, loaded without geometry
+SOIL_INDEX_COLUMNS = ["Jurisdiction", "Suitability"]
+
+
+def load_soil_septic_index(rpc):
+    return load_soil_septic_single(rpc, columns=SOIL_INDEX_COLUMNS, geometry=False)
+
+
 def load_soil_septic_multi(rpcs):
     dfs = [load_soil_septic_single(rpc) for rpc in rpcs]
     return pd.concat(dfs, ignore_index=True, sort=False)
 
 
-## TODO: update with actual path. once in stored place.
-def load_flood_data():
+def flood_path():
+    """The converted flood FGB, or the raw GeoJSON until it's been converted."""
+    return FLOOD_PATH if FLOOD_PATH.is_file() else FLOOD_SOURCE_PATH
+
+
+def load_flood_data(bbox=None):
     return load_data(
-        path= DATADIR / "large-data" / "Flood_Hazard_Areas_(Only_FEMA_-_digitized_data).geojson",
-        simplify_tolerance=0.0001,
+        path=flood_path(),
+        columns=FLOOD_COLUMNS,
+        bbox=bbox,
     )
 
 
-def load_census_data(path):
-    return load_data(path=path, postprocess_fn=split_name_col)
+def load_census_data(path, columns=None, geometry=True):
+    """
+    Census FGB/CSV through the Arrow reader. NAME is always read for split_name_col.
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(["NAME", *columns]))
+    return load_data(
+        path=path,
+        postprocess_fn=split_name_col,
+        columns=columns,
+        arrow=True,
+        geometry=geometry,
+    )
 
 
-def load_census_data_dict(sources, basename=DATADIR / "Census"):
+def clean_census_sources(basename=CENSUS_DIR):
     """
-    Caching a census dictionary.
-    If dictionary includes derived, this caches them from the original raw.
+    Strip stray whitespace from the census source files in place, so the Arrow
+    loads don't have to. Only files that actually change are rewritten.
+
+    Returns the rewritten paths.
     """
-    data = {}
+    paths = census_source_paths(*CENSUS_SOURCES, basename=basename)
+    cleaned = []
+    for path in paths:
+        if path.suffix not in (".fgb", ".csv"):
+            continue
+        is_geo = path.suffix == ".fgb"
+        df = pyogrio.read_dataframe(path) if is_geo else pd.read_csv(path)
+        stripped = strip_all_whitespace(df.copy())
+        if stripped.equals(df) and stripped.columns.equals(df.columns):
+            continue
+
+        tmp = path.with_name(f".tmp-{path.name}")
+        if is_geo:
+            pyogrio.write_dataframe(stripped, tmp, driver="FlatGeobuf")
+        else:
+            stripped.to_csv(tmp, index=False)
+        tmp.replace(path)
+        cleaned.append(path)
+    return cleaned
+
+
+def _timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    LOAD_TIMINGS[label] = elapsed = time.perf_counter() - start
+    logger.info("loaded %s in %.2fs", label, elapsed)
+    return result
+
+
+def census_source_file(src):
+    """File behind a census source: a filename, (filename, func) or ProjectedSource."""
+    if isinstance(src, ProjectedSource):
+        return src.file
+    return src[0] if isinstance(src, tuple) else src
+
+
+def load_census_data_dict(sources, basename=CENSUS_DIR):
+    """
+    Caching a census dictionary. Sources are either
+      - a filename: the whole file,
+      - (filename, func): derived from the whole file, e.g. tidy_census,
+      - a ProjectedSource: only the declared columns of the file.
+
+    Each whole file is read once and every read runs concurrently; derived frames
+    are then built concurrently from the raw frames. Timings go to LOAD_TIMINGS.
+    """
+    reads = {}  # read key -> (filename, columns, geometry)
     for label, src in sources.items():
-        if isinstance(src, tuple):
-            filename, func = src
-            if filename not in data:
-                data[filename] = load_census_data(
-                    Path(basename) / filename
-                )  # cache raw
-            data[label] = func(
-                data[filename]
-            )  # derive and cache from cached raw via func
+        if isinstance(src, ProjectedSource):
+            reads[label] = (src.file, list(src.columns), src.geometry)
         else:
-            data[label] = load_census_data(
-                Path(basename) / src
-            )  # cache raw sans func
+            reads[census_source_file(src)] = (census_source_file(src), None, True)
+
+    def read(key):
+        filename, columns, geometry = reads[key]
+        return _timed(
+            key, load_census_data, Path(basename) / filename, columns, geometry
+        )
+
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+        raw = dict(zip(reads, pool.map(read, reads), strict=True))
+        derived = {
+            label: pool.submit(_timed, label, src[1], raw[src[0]])
+            for label, src in sources.items()
+            if isinstance(src, tuple)
+        }
+        data = {}
+        for label, src in sources.items():
+            if isinstance(src, ProjectedSource):
+                data[label] = raw[label]
+            elif isinstance(src, tuple):
+                data[label] = derived[label].result()
+            else:
+                data[label] = raw[src]
     return data
 
 
 def load_combine_census(label_to_file):
     """
     Function to load many census files given a dictionary.
+    The underlying census dictionaries are loaded concurrently.
     """
+    with ThreadPoolExecutor(max_workers=len(label_to_file)) as pool:
+        df_dicts = list(
+            pool.map(lambda src: masterload(src[0]), label_to_file.values())
+        )
+
     dfs = []
-    for label, (cache, selection) in label_to_file.items():
-        df_dict = masterload(cache)
+    for (label, (cache, selection)), df_dict in zip(
+        label_to_file.items(), df_dicts, strict=True
+    ):
         if selection not in df_dict:
             raise KeyError(f"{selection} not found in cache {cache}")
         df = df_dict[selection].copy()
-        df["Source"] = label
+        df["Source"] = pd.Categorical([label] * len(df))
         dfs.append(df)
-    df_combined = pd.concat(dfs, ignore_index=True, sort=False)
+    df_combined = combine_tidy_census(dfs)
     return df_combined
 
 
-### load metrics we've defined
-def load_metrics(df, metric_source):
+def load_snapshot_rollup(dataset, label, specs):
     """
-    Compute, rename, and scale metrics.
-    Supports:
-      - callable: custom function(df) -> value
+    Every snapshot metric for the state, each County and each Jurisdiction (see
+    metrics.build_rollup), computed once from a snapshot frame.
     """
-    metrics = {}
-    for name, source in metric_source.items():
-        try:
-            metrics[name] = source(df)
-        except Exception as e:
-            print(f"Error {e} loading metric {name}, {source}")
-    return metrics
+    return build_rollup(masterload(dataset)[label], specs)
 
 
-def load_and_process_soil_septic(rpc):
-    raw_data = load_soil_septic_single(rpc)  # load raw data for that rpc
+def load_housing_vintage_rollup(year=2023, basename=CENSUS_DIR):
+    """
+    HOUSING_DELTA_METRICS for every geography (a rollup cube) from one ACS vintage,
+    read through that year's variable crosswalk.
+    """
+    src = housing_vintage_source(year)
+    df = load_census_data(Path(basename) / src.file, list(src.columns), src.geometry)
+    return build_rollup(df, housing_delta_metrics(year))
+
+
+def load_housing_deltas(current=2023, baseline=2013):
+    """
+    Housing metric deltas per geography of the `current` vintage against the
+    `baseline` vintage, or against the current statewide row (baseline="statewide").
+    """
+    table = masterload("census_housing_vintage", year=current)
+    if baseline == "statewide":
+        return metric_deltas(table, table.loc[[("All", "All")]])
+    return metric_deltas(table, masterload("census_housing_vintage", year=baseline))
+
+
+def load_and_process_soil_septic(rpc, bbox=None):
+    raw_data = load_soil_septic_single(rpc, bbox)  # load raw data for that rpc
     processed = process_soil_data(raw_data)  # then process it
     return processed
 
 
+def census_source_paths(*source_dicts, basename=CENSUS_DIR):
+    """
+    Every file a census source dictionary reads from (used for cache freshness),
+    including the bundled ACS label table once it's built.
+    """
+    files = {
+        census_source_file(src) for sources in source_dicts for src in sources.values()
+    }
+    paths = [Path(basename) / f for f in sorted(files)]
+    if census_labels_path().is_file():
+        paths.append(census_labels_path())
+    return paths
+
+
+def rollup_source_paths(sources):
+    """Files a snapshot rollup depends on: its census sources and the metric specs."""
+    return [*census_source_paths(sources), METRIC_SPECS_PATH]
+
+
+def housing_vintage_paths():
+    """Every housing vintage plus the metric specs (the year is a loader param)."""
+    return [*(CENSUS_DIR / f for f in HOUSING_VINTAGES.values()), METRIC_SPECS_PATH]
+
+
+## Caching
+# Bump whenever processing (cleaning, colors, tooltips, joins) changes, so that
+# disk entries written by older code are ignored.
+PROCESSING_VERSION = "7"
+CACHE_DIR = Path(os.environ.get("VT_DATA_CACHE_DIR", DATADIR / ".cache"))
+MEMORY_BUDGET_MB = int(os.environ.get("VT_DATA_CACHE_MB", 2048))
+
 LOADERS = {}
-_DATA_CACHE = {}
-_LOCK = threading.RLock()
+LOADER_SOURCES = {}
+_MEMORY_CACHE = MemoryLRU(max_bytes=MEMORY_BUDGET_MB * 1024**2)
+_DISK_CACHE = DiskCache(
+    CACHE_DIR, enabled=os.environ.get("VT_DISK_CACHE", "1") != "0"
+)
+_LOCK = threading.Lock()
+_KEY_LOCKS = {}  # one lock per cache key, so different datasets load concurrently
+_MISSING = object()
+
+
+def _cache_key(name, rpc=None, params=None):
+    return (name, rpc, *sorted((params or {}).items()))
+
+
+def _key_lock(key):
+    with _LOCK:
+        return _KEY_LOCKS.setdefault(key, threading.Lock())
+
+
+def source_fingerprint(name, rpc=None):
+    """
+    Freshness signature for a loader: its source files' size/mtime plus PROCESSING_VERSION.
+    None if the loader has no registered (local) sources, which keeps it memory-only.
+    """
+    if name not in LOADER_SOURCES:
+        return None
+    paths = LOADER_SOURCES[name](rpc) if rpc is not None else LOADER_SOURCES[name]()
+    files = fingerprint_files(paths)
+    if files is None:
+        return None
+    return {"version": PROCESSING_VERSION, "files": files}
 
 
-def masterload(name, rpc=None):
+def masterload(name, rpc=None, **params):
     """
     function to lazy load / clean data into a cache.
     LOADERS tells how to load the data if not already cached.
-    If already present in cache, we just access.
+    Extra keyword params (e.g. county=...) are passed to the loader and are part of the key.
+
+    Prebuilt join artifacts (`python build_data.py joins`) are read directly when their
+    manifest still matches the inputs. Otherwise, two tiers:
+      - memory: an LRU bounded by MEMORY_BUDGET_MB (env VT_DATA_CACHE_MB)
+      - disk: processed frames as (Geo)Parquet in CACHE_DIR (env VT_DATA_CACHE_DIR), keyed by
+        loader name, rpc, source file size/mtime and PROCESSING_VERSION, so edits to the
+        source files or the processing code invalidate old entries automatically.
+
+    Loads are locked per key, so different datasets can load concurrently (e.g. the
+    four census dictionaries behind census_combined).
+
+    The flood and soil loaders (and their joins) take bbox=(minx, miny, maxx, maxy) to
+    read only the features in a spatial window (see zoning_window); each window is
+    cached separately, and bbox=None is the same as leaving it out.
 
     Note that even if rpc is not used, it's part of the key, so don't pass unless needed
     to avoid duplicate storage!
-
-    The plan is to eventually replace this with other logic from a more sophisticated caching logic.
     """
-    key = (name, rpc)
-    with _LOCK:
-        if key not in _DATA_CACHE:
-            if name not in LOADERS:
-                raise KeyError(f"No loader registered under '{name}'")
+    if "bbox" in params and params["bbox"] is None:
+        del params["bbox"]
+    key = _cache_key(name, rpc, params)
+    data = _MEMORY_CACHE.get(key, _MISSING)
+    if data is not _MISSING:
+        return data
+    if name not in LOADERS:
+        raise KeyError(f"No loader registered under '{name}'")
+
+    # only one thread loads a given key; others wait for it and hit memory
+    with _key_lock(key):
+        data = _MEMORY_CACHE.get(key, _MISSING)
+        if data is not _MISSING:
+            return data
+
+        if name in JOIN_DATASETS and set(params) <= {"bbox"}:
+            data = load_join_artifact(name, rpc, bbox=params.get("bbox"))
+            if data is not None:
+                return _MEMORY_CACHE.put(key, data)
+
+        fingerprint = source_fingerprint(name, rpc)
+        data = _DISK_CACHE.read(key, fingerprint)
+        if data is None:
             if rpc is not None:
-                _DATA_CACHE[key] = LOADERS[name](rpc)
+                data = LOADERS[name](rpc, **params)
             else:
-                _DATA_CACHE[key] = LOADERS[name]()
-        return _DATA_CACHE[key]
+                data = LOADERS[name](**params)
+            _DISK_CACHE.write(key, fingerprint, data)
+        return _MEMORY_CACHE.put(key, data)
+
+
+def clear_cache(disk=False):
+    """
+    Drop everything from the memory tier (and optionally the disk tier).
+    """
+    _MEMORY_CACHE.clear()
+    if disk:
+        _DISK_CACHE.clear()
 
 
 # Map dataset names to loader functions
 LOADERS = {
-    "zoning": lambda: process_zoning_data(load_zoning_data()),
+    "zoning": load_zoning_partitions,
+    "zoning_index": load_zoning_index,
     "soil_septic": load_and_process_soil_septic,
-    "flood_legal": lambda: process_flood_gdf(load_flood_data()),
+    "soil_septic_index": load_soil_septic_index,
+    "flood_legal": lambda bbox=None: process_flood_gdf(load_flood_data(bbox)),
     # Census
     "census_housing": lambda: load_census_data_dict(HOUSING_SOURCES),
     "census_economics": lambda: load_census_data_dict(ECON_SOURCES),
     "census_demographics": lambda: load_census_data_dict(DEMO_SOURCES),
     "census_social": lambda: load_census_data_dict(SOCIAL_SOURCES),
+    "census_housing_snapshot": lambda: load_census_data_dict(HOUSING_SNAPSHOT_SOURCES),
+    "census_economics_snapshot": lambda: load_census_data_dict(ECON_SNAPSHOT_SOURCES),
+    "census_demographics_snapshot": lambda: load_census_data_dict(
+        DEMO_SNAPSHOT_SOURCES
+    ),
+    "census_social_snapshot": lambda: load_census_data_dict(SOCIAL_SNAPSHOT_SOURCES),
+    "census_housing_rollup": lambda: load_snapshot_rollup(
+        "census_housing_snapshot", "housing_2023", HOUSING_SNAPSHOT_METRICS
+    ),
+    "census_economics_rollup": lambda: load_snapshot_rollup(
+        "census_economics_snapshot", "econ_2023", ECON_SNAPSHOT_METRICS
+    ),
+    "census_demographics_rollup": lambda: load_snapshot_rollup(
+        "census_demographics_snapshot", "demogs_2023", DEMOGRAPHIC_SNAPSHOT_METRICS
+    ),
+    "census_social_rollup": lambda: load_snapshot_rollup(
+        "census_social_snapshot", "social_2023", SOCIAL_SNAPSHOT_METRICS
+    ),
+    "census_housing_vintage": load_housing_vintage_rollup,
+    "census_housing_deltas": load_housing_deltas,
     "census_combined": lambda: load_combine_census(COMBINED_CENSUS),
+    "census_geometry": lambda: census_geometry(
+        load_census_data(CENSUS_DIR / CENSUS_GEOMETRY_FILE)
+    ),
     # Joins
-    "flooding_with_zoning": lambda: add_cols_of_biggest_intersection(
+    "flooding_with_zoning": lambda bbox=None: add_cols_of_biggest_intersection(
         donor_gdf=masterload("zoning"),
-        altered_gdf=masterload("flood_legal"),
+        altered_gdf=masterload("flood_legal", bbox=bbox),
         add_columns=["County", "Jurisdiction"],
+        area_crs=EQUAL_AREA_CRS,
     ),
-    "soil_septic_with_zoning": lambda rpc=None: add_cols_of_biggest_intersection(
-        donor_gdf=masterload("zoning"),
-        altered_gdf=masterload("flood_legal", rpc),
-        add_columns=["County"],
+    "soil_septic_with_zoning": lambda rpc=None, bbox=None: (
+        add_cols_of_biggest_intersection(
+            donor_gdf=masterload("zoning"),
+            altered_gdf=masterload("soil_septic", rpc, bbox=bbox),
+            add_columns=["County"],
+            area_crs=EQUAL_AREA_CRS,
+        )
     ),
 }
 
 
-def register_loader(name, func):
+# Map dataset names to the files they're built from (for disk-cache freshness)
+LOADER_SOURCES = {
+    "zoning": lambda rpc=None: [ZONING_PATH],
+    "zoning_index": lambda: [ZONING_PATH],
+    "soil_septic": lambda rpc: [soil_septic_path(rpc)],
+    "soil_septic_index": lambda rpc: [soil_septic_path(rpc)],
+    "flood_legal": lambda: [flood_path()],
+    # Census
+    "census_housing": lambda: census_source_paths(HOUSING_SOURCES),
+    "census_economics": lambda: census_source_paths(ECON_SOURCES),
+    "census_demographics": lambda: census_source_paths(DEMO_SOURCES),
+    "census_social": lambda: census_source_paths(SOCIAL_SOURCES),
+    "census_housing_snapshot": lambda: census_source_paths(HOUSING_SNAPSHOT_SOURCES),
+    "census_economics_snapshot": lambda: census_source_paths(ECON_SNAPSHOT_SOURCES),
+    "census_demographics_snapshot": lambda: census_source_paths(DEMO_SNAPSHOT_SOURCES),
+    "census_social_snapshot": lambda: census_source_paths(SOCIAL_SNAPSHOT_SOURCES),
+    # rollups also go stale when the metric specs change
+    "census_housing_rollup": lambda: rollup_source_paths(HOUSING_SNAPSHOT_SOURCES),
+    "census_economics_rollup": lambda: rollup_source_paths(ECON_SNAPSHOT_SOURCES),
+    "census_demographics_rollup": lambda: rollup_source_paths(DEMO_SNAPSHOT_SOURCES),
+    "census_social_rollup": lambda: rollup_source_paths(SOCIAL_SNAPSHOT_SOURCES),
+    "census_housing_vintage": housing_vintage_paths,
+    "census_housing_deltas": housing_vintage_paths,
+    "census_combined": lambda: census_source_paths(
+        HOUSING_SOURCES, ECON_SOURCES, DEMO_SOURCES, SOCIAL_SOURCES
+    ),
+    "census_geometry": lambda: [CENSUS_DIR / CENSUS_GEOMETRY_FILE],
+    # Joins
+    "flooding_with_zoning": lambda: [ZONING_PATH, flood_path()],
+    "soil_septic_with_zoning": lambda rpc=None: [ZONING_PATH, soil_septic_path(rpc)],
+}
+
+
+def register_loader(name, func, sources=None):
+    """
+    Register a loader. `sources` is an optional callable returning the files it reads,
+    which opts the dataset into the disk cache.
+    """
     LOADERS[name] = func
+    if sources is not None:
+        LOADER_SOURCES[name] = sources
+
+
+## Prebuilt joins (built offline by `python build_data.py joins`)
+# join loader -> rpcs to build it for (None = statewide)
+JOIN_DATASETS = {
+    "flooding_with_zoning": lambda: [None],
+    "soil_septic_with_zoning": lambda: [
+        rpc for rpc in SOIL_RPCS.values() if soil_septic_path(rpc).exists()
+    ],
+}
+
+
+def _join_artifact_key(name, rpc=None):
+    return slug([name] if rpc is None else [name, rpc])
+
+
+def join_manifest(join_dir=JOIN_DIR):
+    path = Path(join_dir) / "manifest.json"
+    if not path.is_file():
+        return {"artifacts": {}}
+    return json.loads(path.read_text())
+
+
+def build_join_artifacts(names=None, join_dir=JOIN_DIR):
+    """
+    Compute each registered join live and write it as a versioned GeoParquet file,
+    recording the sha256 of every input file in the manifest.
+    """
+    join_dir = Path(join_dir)
+    join_dir.mkdir(parents=True, exist_ok=True)
+    manifest = join_manifest(join_dir)
+
+    for name in names or JOIN_DATASETS:
+        for rpc in JOIN_DATASETS[name]():
+            key = _join_artifact_key(name, rpc)
+            data = LOADERS[name](rpc) if rpc is not None else LOADERS[name]()
+            file = f"{key}.v{PROCESSING_VERSION}.parquet"
+            for stale in join_dir.glob(f"{key}.v*.parquet"):
+                stale.unlink()
+            meta = write_frame(join_dir / file, data)
+            sources = (
+                LOADER_SOURCES[name](rpc) if rpc is not None else LOADER_SOURCES[name]()
+            )
+            manifest["artifacts"][key] = {
+                "name": name,
+                "rpc": rpc,
+                "version": PROCESSING_VERSION,
+                "file": file,
+                "attrs": meta["attrs"],
+                "rows": len(data),
+                "inputs": hash_inputs(sources, root=DATADIR),
+            }
+            print(f"Wrote {name} ({rpc or 'statewide'}): {len(data):,} rows")
+
+    (join_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load_join_artifact(name, rpc=None, join_dir=JOIN_DIR, bbox=None):
+    """
+    The prebuilt join (only the rows in the bbox window, if given), or None if it
+    isn't built or is stale (older processing version, or any input file's content
+    changed).
+    """
+    entry = join_manifest(join_dir)["artifacts"].get(_join_artifact_key(name, rpc))
+    if entry is None or entry["version"] != PROCESSING_VERSION:
+        return None
+    path = Path(join_dir) / entry["file"]
+    if not path.is_file() or not inputs_match(entry["inputs"], root=DATADIR):
+        return None
+    try:
+        return read_frame(path, entry, bbox=bbox)
+    except Exception as e:
+        print(f"Error {e} reading join artifact {path}, computing it live")
+        return None
+
+
+## Simplification pyramid (built offline by `python build_data.py pyramid`)
+PYRAMID_DIR = DATADIR / "pyramid"
+# (max zoom, tolerance in degrees), coarsest first. A pixel is ~0.008 degrees at zoom 7
+# and ~0.002 at zoom 9, so a level stays under a pixel two zooms past its max.
+# Maps opened further in get the full-detail (FULL_DETAIL_TOLERANCE) geometry.
+PYRAMID_LEVELS = [(7, 0.002), (9, 0.0005)]
+# dataset -> rpcs to build it for (None = statewide), and which loader keywords
+# filter which columns of a statewide level
+PYRAMID_DATASETS = {
+    "zoning": {"rpcs": lambda: [None], "filters": {"rpc": "RPC", "county": "County"}},
+    "flood_legal": {"rpcs": lambda: [None]},
+    "flooding_with_zoning": {"rpcs": lambda: [None]},
+    "soil_septic": {"rpcs": JOIN_DATASETS["soil_septic_with_zoning"]},
+}
+
+
+def pyramid_level(zoom):
+    """Max zoom of the coarsest pyramid level drawn at `zoom`, None for full detail."""
+    for max_zoom, _ in PYRAMID_LEVELS:
+        if zoom <= max_zoom:
+            return max_zoom
+    return None
+
+
+def _pyramid_key(name, rpc, max_zoom):
+    return slug([name, f"z{max_zoom}"] if rpc is None else [name, rpc, f"z{max_zoom}"])
+
+
+def pyramid_manifest(pyramid_dir=PYRAMID_DIR):
+    path = Path(pyramid_dir) / "manifest.json"
+    if not path.is_file():
+        return {"levels": {}}
+    return json.loads(path.read_text())
+
+
+def _build_pyramid_levels(name, rpc, pyramid_dir, manifest):
+    data = masterload(name, rpc) if rpc is not None else masterload(name)
+    sources = LOADER_SOURCES[name](rpc) if rpc is not None else LOADER_SOURCES[name]()
+    inputs = hash_inputs(sources, root=DATADIR)
+    vertices = shapely.get_num_coordinates(data.geometry.values).sum()
+
+    for max_zoom, tolerance in PYRAMID_LEVELS:
+        key = _pyramid_key(name, rpc, max_zoom)
+        level = data.copy()
+        level[level.geometry.name] = level.geometry.simplify(
+            tolerance, preserve_topology=True
+        )
+        file = f"{key}.v{PROCESSING_VERSION}.parquet"
+        for stale in pyramid_dir.glob(f"{key}.v*.parquet"):
+            stale.unlink()
+        meta = write_frame(pyramid_dir / file, level)
+        level_vertices = shapely.get_num_coordinates(level.geometry.values).sum()
+        manifest["levels"][key] = {
+            "name": name,
+            "rpc": rpc,
+            "max_zoom": max_zoom,
+            "tolerance": tolerance,
+            "version": PROCESSING_VERSION,
+            "file": file,
+            "attrs": meta["attrs"],
+            "vertices": int(level_vertices),
+            "inputs": inputs,
+        }
+        print(
+            f"Wrote {name} ({rpc or 'statewide'}) for zoom <= {max_zoom}: "
+            f"{level_vertices:,} of {vertices:,} vertices"
+        )
+
+
+def build_pyramid(names=None, pyramid_dir=PYRAMID_DIR):
+    """
+    Write every PYRAMID_LEVELS simplification of each registered dataset as a
+    versioned GeoParquet file (topology-preserving, per geometry), recording the
+    sha256 of its input files in the manifest.
+
+    A dataset that fails is reported and skipped, so the others still get built;
+    the (name, rpc) pairs that failed are returned alongside the manifest.
+    """
+    pyramid_dir = Path(pyramid_dir)
+    pyramid_dir.mkdir(parents=True, exist_ok=True)
+    manifest = pyramid_manifest(pyramid_dir)
+
+    failed = []
+    for name in names or PYRAMID_DATASETS:
+        for rpc in PYRAMID_DATASETS[name]["rpcs"]():
+            try:
+                _build_pyramid_levels(name, rpc, pyramid_dir, manifest)
+            except Exception as e:
+                print(f"Error {e} building {name} ({rpc or 'statewide'}), skipping it")
+                failed.append((name, rpc))
+
+    (pyramid_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest, failed
+
+
+def pyramid_entry(name, rpc, max_zoom, pyramid_dir=PYRAMID_DIR):
+    """
+    Manifest entry of a built level, or None if it isn't built or is stale (older
+    processing version or tolerance, or any input file's content changed).
+    """
+    key = _pyramid_key(name, rpc, max_zoom)
+    entry = pyramid_manifest(pyramid_dir)["levels"].get(key)
+    if entry is None or entry["version"] != PROCESSING_VERSION:
+        return None
+    if entry["tolerance"] != dict(PYRAMID_LEVELS)[max_zoom]:
+        return None
+    if not (Path(pyramid_dir) / entry["file"]).is_file():
+        return None
+    if not inputs_match(entry["inputs"], root=DATADIR):
+        return None
+    return entry
+
+
+def load_pyramid_level(
+    rpc=None, dataset=None, max_zoom=None, pyramid_dir=PYRAMID_DIR, bbox=None, **filters
+):
+    """
+    A built pyramid level, reading only the rows matching {column: value} filters
+    and the bbox window.
+    """
+    entry = pyramid_manifest(pyramid_dir)["levels"][
+        _pyramid_key(dataset, rpc, max_zoom)
+    ]
+    filters = [
+        (col, "in", list(value))
+        if isinstance(value, (list, tuple))
+        else (col, "==", value)
+        for col, value in filters.items()
+    ] or None
+    return read_frame(
+        Path(pyramid_dir) / entry["file"], entry, filters=filters, bbox=bbox
+    )
+
+
+def load_for_zoom(name, zoom, rpc=None, **params):
+    """
+    masterload(name, rpc, **params) with geometry simplified for a map opened at
+    `zoom` (its pdk.ViewState zoom): the prebuilt pyramid level when there is a
+    current one, otherwise the full-detail frame. Nothing is simplified here.
+    """
+    level = pyramid_level(zoom)
+    spec = PYRAMID_DATASETS.get(name)
+    if level is None or spec is None:
+        return masterload(name, rpc, **params)
+
+    # statewide levels are filtered by column; per-rpc levels are separate files
+    statewide = spec["rpcs"]() == [None]
+    part = None if statewide else rpc
+    bbox = params.pop("bbox", None)
+    keywords = {"rpc": rpc, **params} if statewide else params
+    try:
+        filters = {
+            spec.get("filters", {})[k]: v for k, v in keywords.items() if v is not None
+        }
+    except KeyError as e:
+        raise KeyError(f"{name} pyramid levels can't be filtered by {e}") from e
+
+    if pyramid_entry(name, part, level) is None:
+        return masterload(name, rpc, bbox=bbox, **params)
+    return masterload(
+        "pyramid_level", part, dataset=name, max_zoom=level, bbox=bbox, **filters
+    )
+
+
+register_loader("pyramid_level", load_pyramid_level)
@@ -3,14 +3,14 @@ import streamlit as st
 
 from app_utils.census import get_geography_title
 from app_utils.constants.ACS import (
-    ACS_DEMOGRAPHIC_METRICS,
     AGE_GROUP_COLUMNS,
     AGE_GROUP_LABELS,
+    DEMOGRAPHIC_SNAPSHOT_METRICS,
     RACE_COLUMNS,
     RACE_LABELS,
 )
-from app_utils.data_loading import load_metrics
 from app_utils.df_filtering import filter_snapshot_data
+from app_utils.metrics import snapshot_metrics
 from app_utils.plot import bar_chart
 
 
@@ -24,11 +24,11 @@ def demographic_snapshot_header():
     )
 
 
-def compute_demog_metrics(df):
-    return load_metrics(df, ACS_DEMOGRAPHIC_METRICS)
+def compute_demog_metrics(df, selected_values=None, rollup=None):
+    return snapshot_metrics(df, DEMOGRAPHIC_SNAPSHOT_METRICS, selected_values, rollup)
 
 
-def build_demog_plot_dataframes(df, metrics):
+def build_demog_plot_dataframes(metrics):
     """
     Calculate a dictionary of demographic dataframes
     """
@@ -37,13 +37,13 @@ def build_demog_plot_dataframes(df, metrics):
         "age_dist": pd.DataFrame(
             {
                 "Age Group": AGE_GROUP_LABELS,
-                "Population": [df[col].sum() for col in AGE_GROUP_COLUMNS],
+                "Population": [metrics[col] for col in AGE_GROUP_COLUMNS],
             }
         ),
         "race_dist": pd.DataFrame(
             {
                 "Race/Ethnicity": RACE_LABELS,
-                "Population": [df[col].sum() for col in RACE_COLUMNS],
+                "Population": [metrics[col] for col in RACE_COLUMNS],
             }
         ),
         "sex_dist": pd.DataFrame(
@@ -55,13 +55,13 @@ def build_demog_plot_dataframes(df, metrics):
     }
 
 
-def demog_df_metric_dict(filtered_gdf_2023):
-    metrics = compute_demog_metrics(filtered_gdf_2023)
-    dfs = build_demog_plot_dataframes(filtered_gdf_2023, metrics)
+def demog_df_metric_dict(gdf_2023, selected_values=None, rollup=None):
+    metrics = compute_demog_metrics(gdf_2023, selected_values, rollup)
+    dfs = build_demog_plot_dataframes(metrics)
     return metrics, dfs
 
 
-def demographic_snapshot(demog_dfs):
+def demographic_snapshot(demog_dfs, rollup=None):
     # Display the Category Header with Data Source
     demographic_snapshot_header()
 
@@ -74,7 +74,9 @@ def demographic_snapshot(demog_dfs):
     title_geo = get_geography_title(selected_values)
 
     # Based on the system color theme, update the text color (only used in donut plots)
-    metrics, plot_dfs = demog_df_metric_dict(filtered_dfs["demogs_2023"])
+    metrics, plot_dfs = demog_df_metric_dict(
+        demog_dfs["demogs_2023"], selected_values, rollup
+    )
 
     # Snapshot sections
     ## TODO: maybe better to run all of these with **kwargs, or just all take the same args, idk
@@ -1,43 +1,185 @@
+import threading
+import weakref
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from app_utils.cache import MemoryLRU
+
 
 ## helper functions
 def ensure_list(x):
     return x if isinstance(x, list) else [x]
 
 
+class FilterIndex:
+    """
+    Precomputed filter index for one frame: for every filter column, the sorted row
+    positions of each value (from its categorical codes). Filtering is then a union
+    of the selected values' positions per column, intersected down the hierarchy.
+
+    Results are memoized per selection prefix, so changing one filter only
+    recomputes the levels below it.
+    """
+
+    MAX_MEMO = 256
+
+    def __init__(self, df, columns):
+        self.columns = list(columns)
+        self.n_rows = len(df)
+        self.positions = {col: self._value_positions(df[col]) for col in self.columns}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _value_positions(series):
+        codes, uniques = pd.factorize(series, sort=True)
+        order = np.argsort(codes, kind="stable")  # positions grouped by code, sorted
+        order = order[codes[order] >= 0]  # drop NaN (never a filter option)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return dict(
+            zip(uniques.tolist(), np.split(order, np.cumsum(counts)[:-1]), strict=False)
+        )
+
+    def _select_column(self, col, values):
+        arrays = [self.positions[col][v] for v in values if v in self.positions[col]]
+        if not arrays:
+            return np.empty(0, dtype=np.intp)
+        if len(arrays) == 1:
+            return arrays[0]
+        return np.sort(np.concatenate(arrays))
+
+    def select(self, selections):
+        """
+        Sorted row positions matching the selections ({col: values}), or None if no
+        filter applies. Columns not in the index and empty selections are skipped.
+        """
+        positions, prefix = None, ()
+        for col, values in selections.items():
+            if values is None or not values or col not in self.positions:
+                continue
+            values = ensure_list(values)
+            prefix += ((col, tuple(values)),)
+            with self._lock:
+                cached = self._memo.get(prefix)
+            if cached is None:
+                rows = self._select_column(col, values)
+                if positions is not None:
+                    rows = np.intersect1d(positions, rows, assume_unique=True)
+                cached = rows
+                with self._lock:
+                    if len(self._memo) >= self.MAX_MEMO:
+                        self._memo.clear()
+                    self._memo[prefix] = cached
+            positions = cached
+        return positions
+
+
+def dataframe_to_tree(df, hierarchy_cols):
+    """
+    Convert a DataFrame into a nested dict keyed by hierarchy_cols (leaves are None),
+    built from the unique combinations rather than a recursive groupby.
+    Keys are sorted and missing values are skipped, like groupby.
+    """
+    if not hierarchy_cols:
+        return None
+
+    combos = df[list(hierarchy_cols)].drop_duplicates()
+    combos = combos.sort_values(list(hierarchy_cols))
+    last = len(hierarchy_cols) - 1
+    tree = {}
+    for row in combos.itertuples(index=False, name=None):
+        node = tree
+        for depth, value in enumerate(row):
+            if pd.isna(value):
+                break
+            if depth == last:
+                node.setdefault(value, None)
+            else:
+                node = node.setdefault(value, {})
+    return tree
+
+
+# Shared caches of per-frame structures, keyed by (dataset identity, columns).
+# Identity is an explicit dataset_key when given, otherwise id(frame) (released when
+# the frame is collected, since ids get reused).
+_FILTER_INDEXES = MemoryLRU(max_bytes=256 * 1024**2)
+_FILTER_TREES = MemoryLRU(max_bytes=64 * 1024**2)
+
+
+def _cached_for_frame(cache, df, columns, build, dataset_key=None):
+    if dataset_key is not None:
+        key = ("dataset", dataset_key, tuple(columns))
+    else:
+        key = ("frame", id(df), tuple(columns))
+
+    value = cache.get(key)
+    if value is not None and value[0] == len(df):
+        return value[1]
+
+    built = build(df, columns)
+    if dataset_key is None and key not in cache:
+        weakref.finalize(df, cache.pop, key)
+    nbytes = 8 * len(df) if isinstance(built, FilterIndex) else 1024 + 64 * len(df)
+    cache.put(key, (len(df), built), nbytes=nbytes)
+    return built
+
+
+def get_filter_index(df, columns, dataset_key=None):
+    """
+    The FilterIndex for a frame, built once and reused for as long as the frame lives
+    (masterload hands out the same cached frame on every rerun).
+    """
+    return _cached_for_frame(_FILTER_INDEXES, df, columns, FilterIndex, dataset_key)
+
+
+def get_filter_tree(df, columns, dataset_key=None):
+    """
+    The cascading-filter tree for a frame and hierarchy, computed once per
+    (dataset, columns) instead of on every rerun.
+    """
+    return _cached_for_frame(_FILTER_TREES, df, columns, dataframe_to_tree, dataset_key)
+
+
 class FilterState:
-    def __init__(self, df, filter_columns):
+    def __init__(self, df, filter_columns, dataset_key=None):
+        """
+        dataset_key names the dataset for the shared tree cache when `df` is rebuilt on
+        every rerun (so its identity can't be used); it must change with the contents.
+        """
         self.df = df
         self.filter_columns = filter_columns
+        self.dataset_key = dataset_key
         self.selections = {col: None for col in filter_columns}
         self.raw_selections = {col: None for col in filter_columns}
-        self.tree = self.dataframe_to_tree(self.df, self.filter_columns)
+        self.tree = get_filter_tree(self.df, self.filter_columns, dataset_key)
 
     def dataframe_to_tree(self, df, hierarchy_cols) -> dict:
         """Convert a DataFrame into a nested dict keyed by hierarchy_cols."""
-        if not hierarchy_cols:
-            return None
-
-        col = hierarchy_cols[0]
-        tree = {}
-        for key, group in df.groupby(col):
-            tree[key] = self.dataframe_to_tree(group, hierarchy_cols[1:])
-        return tree
+        return dataframe_to_tree(df, hierarchy_cols)
 
     def apply_filters(self, df=None):
-        """Apply current filter selections to dataframe"""
+        """
+        Apply current filter selections to dataframe (self.df by default).
+        Uses the frame's cached FilterIndex, so only the matching rows are copied.
+        """
+        dataset_key = None
         if df is None:
-            df = self.df.copy()
+            df, dataset_key = self.df, self.dataset_key
 
-        for col, selected_values in self.selections.items():
-            if selected_values is None or not selected_values:
-                continue
-            if col not in df.columns:
-                continue
-            df = df[df[col].isin(selected_values)]
-        return df
+        columns = [col for col in self.filter_columns if col in df.columns]
+        positions = get_filter_index(df, columns, dataset_key).select(self.selections)
+        if positions is None:
+            return df.copy(deep=False)
+        return df.take(positions)
+
+    def cache_key(self):
+        """Hashable snapshot of the current selections, for caching filtered results."""
+        return tuple(
+            (col, None if values is None else tuple(map(str, ensure_list(values))))
+            for col, values in self.selections.items()
+        )
 
 
 class FilterUI:
@@ -171,10 +313,12 @@ def filter_wrapper(
     defaults=None,
     passed_cols=None,
     header=None,
+    dataset_key=None,
 ):
     filter_state = FilterState(
         df=df,
         filter_columns=filter_columns,
+        dataset_key=dataset_key,
     )
 
     filter_ui = FilterUI(
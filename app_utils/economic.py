@@ -14,12 +14,13 @@ from app_utils.color import get_text_color
 
 # import constants
 from app_utils.constants.ACS import (
-    ACS_ECON_METRICS,
+    ECON_SNAPSHOT_METRICS,
     FAMILY_INCOME_COLUMNS,
     FAMILY_INCOME_LABELS,
+    POVERTY_BY_AGE_COLUMNS,
 )
-from app_utils.data_loading import load_metrics
 from app_utils.df_filtering import filter_snapshot_data
+from app_utils.metrics import snapshot_metrics
 from app_utils.plot import (
     bar_chart,
     donut_chart,
@@ -264,7 +265,7 @@ def commute_habits_ts_plot(filtered_commute_habits_df, title_geo):
     )
 
 
-def build_econ_plot_dataframes(df, metrics):
+def build_econ_plot_dataframes(metrics):
     """
     Calculate a dictionary of economic dataframes
     """
@@ -277,9 +278,6 @@ def build_econ_plot_dataframes(df, metrics):
             }
         )
 
-    def mean_pct(col):
-        return df[col].mean() / 100
-
     return {
         "public_private_coverage_df": pd.DataFrame(
             {
@@ -293,7 +291,7 @@ def build_econ_plot_dataframes(df, metrics):
         "family_income_df": pd.DataFrame(
             {
                 "Family Income": FAMILY_INCOME_LABELS,
-                "Estimated Families": [df[col].sum() for col in FAMILY_INCOME_COLUMNS],
+                "Estimated Families": [metrics[col] for col in FAMILY_INCOME_COLUMNS],
             }
         ),
         "pov_people_df": pov_df(metrics["pct_people_below_pov"]),
@@ -301,32 +299,28 @@ def build_econ_plot_dataframes(df, metrics):
         "poverty_by_age_df": pd.DataFrame(
             {
                 "Age": ["Under 18 years", "18 - 64 years", "65+ years"],
-                "Poverty Rate": [
-                    mean_pct("DP03_0129PE"),
-                    mean_pct("DP03_0134PE"),
-                    mean_pct("DP03_0135PE"),
-                ],
+                "Poverty Rate": [metrics[col] / 100 for col in POVERTY_BY_AGE_COLUMNS],
             }
         ),
     }
 
 
-def compute_econ_metrics(df):
-    metrics = load_metrics(df, ACS_ECON_METRICS)
+def compute_econ_metrics(df, selected_values=None, rollup=None):
+    metrics = snapshot_metrics(df, ECON_SNAPSHOT_METRICS, selected_values, rollup)
 
     # manual calculation
     metrics["wage_gap"] = metrics["male_earnings"] - metrics["female_earnings"]
     return metrics
 
 
-def econ_df_metric_dict(filtered_gdf_2023):
-    metrics = compute_econ_metrics(filtered_gdf_2023)
-    dfs = build_econ_plot_dataframes(filtered_gdf_2023, metrics)
+def econ_df_metric_dict(gdf_2023, selected_values=None, rollup=None):
+    metrics = compute_econ_metrics(gdf_2023, selected_values, rollup)
+    dfs = build_econ_plot_dataframes(metrics)
     return metrics, dfs
 
 
 # NOTE: The `st.metric` delta (^change) values are simply placeholders for now (not real data!)
-def economic_snapshot(econ_dfs):
+def economic_snapshot(econ_dfs, rollup=None):
     # Display the category header with data source
     economic_snapshot_header()
 
@@ -341,7 +335,10 @@ def economic_snapshot(econ_dfs):
     # Based on the system color theme, update the text color (only used in donut plots)
     text_color = get_text_color(key="economic_snapshot")
     # Define two callable dictionaries: Metrics and Plot DataFrames
-    metrics, plot_dfs = econ_df_metric_dict(filtered_dfs["econ_2023"])
+    # Metrics are looked up per geography in the rollup cube
+    metrics, plot_dfs = econ_df_metric_dict(
+        econ_dfs["econ_2023"], selected_values, rollup
+    )
 
     ## TODO: maybe better to run all of these with **kwargs, or just all take the same args, idk
     render_employment(econ_dfs, metrics, filtered_dfs, title_geo)
@@ -6,21 +6,16 @@ Description: layer for all the non-streamlit logic for the flooding page
 
 from app_utils.mapping import add_tooltip_from_dict, map_gdf_single_layer
 
+# source attributes clean_flood_gdf reads
+FLOOD_COLUMNS = ["SFHA_TF", "FLD_ZONE", "ZONE_SUBTY", "STATIC_BFE"]
 
-def explode_flood_polygons(gdf):
-    def get_coordinates(geom):
-        if geom.geom_type == "Polygon":
-            return [list(geom.exterior.coords)]
-        elif geom.geom_type == "MultiPolygon":
-            return [list(poly.exterior.coords) for poly in geom.geoms]
-        return []
-
-    # Define a new "coordinates" column derived from geometry
-    gdf["coordinates"] = gdf["geometry"].apply(get_coordinates)
 
-    gdf.explode(index_parts=False)
-    gdf.explode("coordinates", ignore_index=True)
-    return gdf
+def explode_flood_polygons(gdf):
+    """
+    One row per polygon (MultiPolygons split into their parts). Map layers encode the
+    coordinates themselves (see mapping.polygon_paths), so none are stored here.
+    """
+    return gdf.explode(index_parts=False, ignore_index=True)
 
 
 def add_flood_color(gdf):
@@ -34,8 +29,9 @@ def clean_flood_gdf(gdf):
     """
     gdf = gdf[gdf["SFHA_TF"] == "T"]
     gdf["ZONE_SUBTY_DISPLAY"] = gdf["ZONE_SUBTY"].fillna("None")
-    gdf["STATIC_BFE_DISPLAY"] = gdf["STATIC_BFE"].where(
-        gdf["STATIC_BFE"] != -9999, "N/A"
+    # one type (str) for the column, since parquet can't store floats mixed with "N/A"
+    gdf["STATIC_BFE_DISPLAY"] = (
+        gdf["STATIC_BFE"].where(gdf["STATIC_BFE"] != -9999, "N/A").astype(str)
     )
     gdf = gdf[
         [
@@ -12,13 +12,13 @@ import streamlit as st
 from app_utils.census import get_geography_title
 from app_utils.color import get_text_color
 from app_utils.constants.ACS import (
-    ACS_HOUSING_METRICS,
+    HOUSING_SNAPSHOT_METRICS,
     HOUSING_YEAR_LABELS,
     NEW_HOUSING_UNIT_COLUMNS,
     POPULATION_YEAR_LABELS,
 )
-from app_utils.data_loading import load_metrics
 from app_utils.df_filtering import filter_snapshot_data
+from app_utils.metrics import snapshot_metrics
 from app_utils.plot import bar_chart, donut_chart, make_time_series_plot
 
 
@@ -149,15 +149,18 @@ def housing_pop_plot(plot_dfs, title_geo):
     )
 
 
-def compute_housing_metrics(df):
-    return load_metrics(df, ACS_HOUSING_METRICS)
+def compute_housing_metrics(df, selected_values=None, rollup=None):
+    return snapshot_metrics(df, HOUSING_SNAPSHOT_METRICS, selected_values, rollup)
 
 
-def housing_df_metric_dict(filtered_housing_2023):
-    # Unpack necessary datasets
-    filtered_gdf_2023 = filtered_housing_2023["housing_2023"]
-    metrics = compute_housing_metrics(filtered_gdf_2023)
-    dfs = build_housing_plot_dataframes(filtered_housing_2023, metrics)
+def housing_df_metric_dict(
+    housing_dfs, filtered_housing_dfs, selected_values=None, rollup=None
+):
+    # Metrics are looked up per geography in the rollup cube
+    metrics = compute_housing_metrics(
+        housing_dfs["housing_2023"], selected_values, rollup
+    )
+    dfs = build_housing_plot_dataframes(filtered_housing_dfs, metrics)
 
     return metrics, dfs
 
@@ -167,17 +170,15 @@ def build_housing_plot_dataframes(dfs, metrics):
     Calculate a dictionary of housing dataframes
     """
 
-    filtered_gdf_2023 = dfs["housing_2023"]
-
     filtered_pop_df = dfs["vt_historic_population"]
 
-    population_counts = [
-        filtered_pop_df.loc[filtered_pop_df["Year"] == year, "Population"].sum()
-        for year in POPULATION_YEAR_LABELS
-    ]
-    raw_housing_counts = [
-        filtered_gdf_2023[col].sum() for col in NEW_HOUSING_UNIT_COLUMNS
-    ]
+    population_counts = (
+        filtered_pop_df.groupby("Year")["Population"]
+        .sum()
+        .reindex(POPULATION_YEAR_LABELS, fill_value=0)
+        .tolist()
+    )
+    raw_housing_counts = [metrics[col] for col in NEW_HOUSING_UNIT_COLUMNS]
     # get hardcoded metrics
     pct_occ_2023 = metrics["pct_occupied"]
     pct_vac_2023 = metrics["pct_vacant"]
@@ -248,7 +249,7 @@ def build_housing_plot_dataframes(dfs, metrics):
     }
 
 
-def housing_snapshot(housing_dfs):
+def housing_snapshot(housing_dfs, rollup=None):
     # Display the Category Header with Data Source
     housing_snapshot_header()
 
@@ -265,7 +266,9 @@ def housing_snapshot(housing_dfs):
     # Based on the system color theme, update the text color (only used in donut plots)
     text_color = get_text_color(key="housing_snapshot")
     # Define two callable dictionaries: Metrics and Plot DataFrames
-    metrics, plot_dfs = housing_df_metric_dict(filtered_housing_dfs)
+    metrics, plot_dfs = housing_df_metric_dict(
+        housing_dfs, filtered_housing_dfs, selected_values, rollup
+    )
 
     # Display the population and housing units time series plot
     population_units_plot = housing_pop_plot(plot_dfs, title_geo)
@@ -6,12 +6,162 @@ NOTE: everything should be in espg=4326 when it gets here, as is set in data-loa
 """
 
 import json
+import weakref
+from typing import NamedTuple
 
-import geopandas as gpd
+import numpy as np
 import pandas as pd
 import pydeck as pdk
+import shapely
 import streamlit as st
 
+from app_utils.cache import MemoryLRU, estimate_nbytes
+from app_utils.tiles import TILE_DATASETS, TILE_URL
+
+# properties every GeoJSON layer reads (fill color + pydeck tooltip)
+LAYER_PROPERTIES = ["rgba_color", "tooltip"]
+
+# initial zoom of multi_layer_map (statewide), for picking a simplification level
+MULTI_LAYER_ZOOM = 7
+
+# encoded layer payloads, keyed by (dataset, filter selection)
+_LAYER_CACHE = MemoryLRU(max_bytes=512 * 1024**2)
+# Python memory of the nested lists in a payload: a coordinate is an [x, y] list (72
+# bytes), its two floats (48) and its slot in the ring (8); a ring or polygon list is
+# ~64 bytes; a GeoJSON feature adds three dicts (~600)
+COORDINATE_NBYTES = 128
+PART_NBYTES = 64
+FEATURE_NBYTES = 600
+
+
+def _split(items, counts):
+    """Split a list into consecutive chunks of the given sizes."""
+    offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]).tolist()
+    return [items[s:e] for s, e in zip(offsets[:-1], offsets[1:], strict=False)]
+
+
+class PolygonPaths(NamedTuple):
+    """
+    Polygon vertices as flat arrays, in the layout of deck.gl's binary polygon data:
+    rings are consecutive runs of `positions` and polygons consecutive runs of rings,
+    outer ring first. MultiPolygons are one polygon per part.
+    """
+
+    positions: np.ndarray  # (2 * vertices,) x, y interleaved
+    ring_offsets: np.ndarray  # (rings + 1,) vertex offset of each ring
+    polygon_offsets: np.ndarray  # (polygons + 1,) ring offset of each polygon
+    feature_index: np.ndarray  # (polygons,) row each polygon belongs to
+
+    def start_indices(self):
+        """Vertex offset of each polygon (PolygonLayer `startIndices`)."""
+        return self.ring_offsets[self.polygon_offsets]
+
+
+def polygon_paths(geoms, dtype=np.float32):
+    """
+    Encode polygon geometries with one shapely.get_coordinates call. float32 positions
+    (the default) go straight into deck.gl attributes; GeoJSON needs float64.
+    """
+    geoms = np.asarray(geoms)
+    parts, feature_index = shapely.get_parts(geoms, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    ring_sizes = shapely.get_num_coordinates(rings)
+    part_sizes = np.bincount(ring_part, minlength=len(parts))
+    return PolygonPaths(
+        positions=shapely.get_coordinates(rings).astype(dtype, copy=False).ravel(),
+        ring_offsets=np.concatenate([[0], np.cumsum(ring_sizes)]).astype(np.uint32),
+        polygon_offsets=np.concatenate([[0], np.cumsum(part_sizes)]).astype(np.uint32),
+        feature_index=feature_index.astype(np.uint32),
+    )
+
+
+def geometries_to_geojson(geoms):
+    """
+    GeoJSON geometry dicts built straight from the coordinate arrays.
+
+    Polygons and MultiPolygons (all of our layers) are unpacked from polygon_paths
+    with one big `tolist()`; anything else falls back to shapely's own GeoJSON.
+    """
+    geoms = np.asarray(geoms)
+    paths = polygon_paths(geoms, dtype=np.float64)
+    ring_coords = _split(
+        paths.positions.reshape(-1, 2).tolist(), np.diff(paths.ring_offsets)
+    )
+    polygons = _split(ring_coords, np.diff(paths.polygon_offsets))
+    geom_polygons = _split(
+        polygons, np.bincount(paths.feature_index, minlength=len(geoms))
+    )
+
+    out = []
+    for geom, type_id, polys in zip(
+        geoms, shapely.get_type_id(geoms).tolist(), geom_polygons, strict=False
+    ):
+        if type_id == 3:
+            out.append({"type": "Polygon", "coordinates": polys[0] if polys else []})
+        elif type_id == 6:
+            out.append({"type": "MultiPolygon", "coordinates": polys})
+        elif type_id == -1:
+            out.append(None)
+        else:
+            out.append(json.loads(shapely.to_geojson(geom)))
+    return out
+
+
+def gdf_to_geojson(gdf, properties=None):
+    """
+    FeatureCollection dict for a pydeck layer, without the to_json/json.loads string
+    round trip, carrying only the properties the layer actually reads.
+    """
+    properties = properties or LAYER_PROPERTIES
+    props = gdf[[c for c in properties if c in gdf.columns]]
+    props = props.astype(object).where(props.notna(), None).to_dict("records")
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "geometry": geom, "properties": prop}
+            for geom, prop in zip(
+                geometries_to_geojson(gdf.geometry.values), props, strict=False
+            )
+        ],
+    }
+
+
+def payload_nbytes(geometry, properties, feature_nbytes=0):
+    """
+    Rough memory of a payload holding `geometry` as nested Python lists (see
+    COORDINATE_NBYTES) plus the `properties` frame, for the _LAYER_CACHE budget.
+    """
+    parts = shapely.get_parts(geometry)
+    n_lists = 2 * len(parts) + int(shapely.get_num_interior_rings(parts).sum())
+    return (
+        int(shapely.get_num_coordinates(geometry).sum()) * COORDINATE_NBYTES
+        + n_lists * PART_NBYTES
+        + len(geometry) * feature_nbytes
+        + estimate_nbytes(properties)
+    )
+
+
+def layer_data(gdf, cache_key=None, properties=None):
+    """
+    Encoded layer payload. With a cache_key (e.g. (dataset, filter selection)), reruns
+    with unchanged filters reuse the payload and skip encoding entirely.
+    """
+    if cache_key is None:
+        return gdf_to_geojson(gdf, properties)
+    geojson = _LAYER_CACHE.get(cache_key)
+    if geojson is None:
+        properties = properties or LAYER_PROPERTIES
+        geojson = _LAYER_CACHE.put(
+            cache_key,
+            gdf_to_geojson(gdf, properties),
+            nbytes=payload_nbytes(
+                gdf.geometry.values,
+                pd.DataFrame(gdf[[c for c in properties if c in gdf.columns]]),
+                FEATURE_NBYTES,
+            ),
+        )
+    return geojson
+
 
 def build_layer(geojson, name="GeoJsonLayer"):
     """
@@ -32,12 +182,15 @@ def build_layer(geojson, name="GeoJsonLayer"):
     return layer
 
 
-def map_gdf_single_layer(gdf, view_state=None):
+def map_gdf_single_layer(gdf, view_state=None, cache_key=None):
     """
     Function to convert gdf into geojson and then map it with tooltip.
+    Pass a cache_key (dataset + filter selection) to reuse the encoded layer on reruns.
     """
 
-    geojson = json.loads(gdf.to_json())
+    geojson = layer_data(
+        gdf, cache_key=cache_key, properties=["rgba_color", *tooltip_columns(gdf)]
+    )
 
     ## create the layer
     layer = build_layer(geojson)
@@ -51,7 +204,7 @@ def map_gdf_single_layer(gdf, view_state=None):
             latitude=center_lat, longitude=center_lon, min_zoom=6.5, zoom=10
         )
 
-    tooltip = {"html": "{tooltip}"}
+    tooltip = {"html": tooltip_template(gdf)}
     map_style = st.session_state.map_style
     # return the map with layer
     return pdk.Deck(
@@ -62,74 +215,191 @@ def map_gdf_single_layer(gdf, view_state=None):
     )
 
 
-def add_tooltip_from_dict(gdf, label_to_col, gdf_name=None):
+## Choropleths: fixed polygons (e.g. census towns) recolored per variable
+def polygon_layer_geometry(gdf, key="GEOID", decimals=5):
     """
-    Adds a tooltip column (for pydeck) using a dictionary with format {"label": "column_name"}.
-    Optionally includes the gdf_name as the top line with a separator.
+    PolygonLayer rows (key, polygon rings) of a frame's geometry, one per polygon
+    part, encoded with polygon_paths and reused for as long as the frame lives
+    (masterload hands out the same cached frame on every rerun). This only caches
+    the server-side encoding: st.pydeck_chart sends the whole deck as JSON on every
+    rerun, so the browser still receives every ring with each map.
     """
-    gdf = gdf.copy()
+    cache_key = ("polygons", id(gdf), key)
+    cached = _LAYER_CACHE.get(cache_key)
+    if cached is not None and cached[0] == len(gdf):
+        return cached[1]
 
-    def format_tooltip(row):
-        lines = []
-        if gdf_name:
-            lines.append(f"<b>{gdf_name}</b>")
-            lines.append("<hr/>")
-        lines += [f"<b>{label}:</b> {row[col]}" for label, col in label_to_col.items()]
-        return "<br/>".join(lines)
+    paths = polygon_paths(gdf.geometry.values, dtype=np.float64)
+    coords = np.round(paths.positions, decimals).reshape(-1, 2).tolist()
+    rings = _split(coords, np.diff(paths.ring_offsets))
+    geometry = pd.DataFrame(
+        {
+            key: gdf[key].to_numpy()[paths.feature_index],
+            "polygon": _split(rings, np.diff(paths.polygon_offsets)),
+        }
+    )
+    if cache_key not in _LAYER_CACHE:
+        weakref.finalize(gdf, _LAYER_CACHE.pop, cache_key)
+    _LAYER_CACHE.put(
+        cache_key,
+        (len(gdf), geometry),
+        nbytes=payload_nbytes(gdf.geometry.values, geometry[[key]]),
+    )
+    return geometry
 
-    gdf["tooltip"] = gdf.apply(format_tooltip, axis=1)
-    return gdf
 
+def polygon_layer_data(geometry, df, key="GEOID", columns=("rgba_color",)):
+    """
+    The cached polygons of the keys in df, with df's `columns` taken onto them by key.
+    Only these columns are rebuilt for a new variable; the rings are shared lists,
+    but they are serialized again with the rest of the deck.
+    """
+    rows = pd.Index(df[key]).get_indexer(geometry[key])
+    present = rows >= 0
+    rows = rows[present]
+    data = {"polygon": geometry["polygon"].to_numpy()[present]}
+    for col in columns:
+        values = df[col].to_numpy(dtype=object)[rows]
+        values[pd.isna(values)] = None
+        data[col] = values
+    return pd.DataFrame(data)
 
-def multi_layer_map(gdfs):
-    geojsons = [json.loads(gdf.to_json()) for gdf in gdfs.values()]
-    layers = [build_layer(jsn) for jsn in geojsons]
-    view_state = pdk.ViewState(latitude=44.26, longitude=-72.57, min_zoom=6.5, zoom=7)
-    tooltip = {"html": "{tooltip}"}
-    map_style = st.session_state.map_style
 
+def choropleth_map(df, geometry, view_state, key="GEOID"):
+    """
+    One value per key (e.g. a census variable per town, with rgba_color and a lazy
+    tooltip) drawn as a PolygonLayer over polygon_layer_geometry. Plain JSON rows:
+    st.pydeck_chart has no binary attributes or incremental data updates.
+    """
+    data = polygon_layer_data(
+        geometry, df, key, columns=["rgba_color", *tooltip_columns(df)]
+    )
+    layer = pdk.Layer(
+        "PolygonLayer",
+        data=data,
+        get_polygon="polygon",
+        get_fill_color="rgba_color",
+        get_line_color=[80, 80, 80, 80],
+        highlight_color=[222, 102, 0, 200],
+        line_width_min_pixels=0.5,
+        pickable=True,
+        auto_highlight=True,
+    )
     return pdk.Deck(
-        layers=layers,
+        layers=[layer],
         initial_view_state=view_state,
-        tooltip=tooltip,
-        map_style=map_style,
+        tooltip={"html": tooltip_template(df)},
+        map_style=st.session_state.map_style,
     )
 
 
-def add_cols_of_biggest_intersection(donor_gdf, altered_gdf, add_columns=None):
+def _tooltip_parts(label_to_col, gdf_name=None):
+    """Literal HTML prefix for each tooltip line, paired with its column."""
+    header = f"<b>{gdf_name}</b><br/><hr/><br/>" if gdf_name else ""
+    return [
+        (("" if i else header) + ("<br/>" if i else "") + f"<b>{label}:</b> ", col)
+        for i, (label, col) in enumerate(label_to_col.items())
+    ]
+
+
+def tooltip_template(gdf):
+    """
+    pydeck tooltip html for a frame. Lazy tooltips (see add_tooltip_from_dict) are a
+    template deck.gl fills client-side from each feature's properties.
     """
-    Take add_columns from the donor frame and add them to the altered frame.
+    spec = gdf.attrs.get("tooltip_spec")
+    if spec is None or "tooltip" in gdf.columns:
+        return "{tooltip}"
+    return "".join(f"{prefix}{{{col}}}" for prefix, col in _tooltip_parts(**spec))
+
 
-    Adds 1 value per add_column per geometry in the altered_gdf.
-    Gets those values from the geometry in the donor gdf with which the altered_gdf geometry
-        has the **largest intersection**
+def tooltip_columns(gdf):
+    """Properties the tooltip reads from each feature."""
+    spec = gdf.attrs.get("tooltip_spec")
+    if spec is None or "tooltip" in gdf.columns:
+        return ["tooltip"]
+    return list(spec["label_to_col"].values())
 
-    Returns the altered_gdf with new columns.
+
+def add_tooltip_from_dict(gdf, label_to_col, gdf_name=None, lazy=False):
+    """
+    Adds a tooltip column (for pydeck) using a dictionary with format {"label": "column_name"}.
+    Optionally includes the gdf_name as the top line with a separator.
+
+    With lazy=True no per-row HTML is built: the spec is stored in gdf.attrs and
+    single-layer maps pass pydeck a template instead. Use materialize_tooltip for
+    consumers that need the column (multi-layer maps, vector tiles).
     """
-    add_columns = add_columns or ["County", "District"]
+    gdf = gdf.copy()
+    if lazy:
+        gdf = gdf.drop(columns="tooltip", errors="ignore")
+        gdf.attrs["tooltip_spec"] = {
+            "label_to_col": dict(label_to_col),
+            "gdf_name": gdf_name,
+        }
+        return gdf
+
+    tooltip = pd.Series("", index=gdf.index, dtype=object)
+    for prefix, col in _tooltip_parts(label_to_col, gdf_name):
+        tooltip = tooltip + prefix + gdf[col].astype(str)
+    gdf["tooltip"] = tooltip
+    return gdf
 
-    ## store original crs and set crs to a more easily calculable format
-    og_crs = donor_gdf.crs
-    donor_gdf = donor_gdf.copy().to_crs(epsg=3857)
-    altered_gdf = altered_gdf.copy().to_crs(epsg=3857)
 
-    ## save indices
-    donor_gdf["donor_index"] = donor_gdf.index
-    altered_gdf["alt_index"] = altered_gdf.index
+def materialize_tooltip(gdf):
+    """Turn a lazy tooltip spec into the actual tooltip column."""
+    spec = gdf.attrs.get("tooltip_spec")
+    if spec is None or "tooltip" in gdf.columns:
+        return gdf
+    return add_tooltip_from_dict(gdf, **spec)
 
-    ## get largest intersections only (for each geometry in the alt_index)
-    intersections = gpd.overlay(donor_gdf, altered_gdf, how="intersection")
-    intersections["intersect_area"] = intersections.geometry.area
-    largest = intersections.sort_values(
-        "intersect_area", ascending=False
-    ).drop_duplicates("alt_index", keep="first")
 
-    ## merge relevant cols back into the og alt
-    merge_cols = ["alt_index"] + add_columns
-    final_df = pd.merge(
-        left=altered_gdf, right=largest[merge_cols], on=["alt_index"], how="left"
+def build_mvt_layer(dataset, tile_url=TILE_URL):
+    """
+    Function to make a layer that streams prebuilt vector tiles (see app_utils/tiles.py)
+    from the backend, so the browser only downloads the tiles in view.
+    """
+    layer = pdk.Layer(
+        "MVTLayer",
+        data=f"{tile_url}/{dataset}/{{z}}/{{x}}/{{y}}.pbf",
+        min_zoom=TILE_DATASETS[dataset]["minzoom"],
+        max_zoom=TILE_DATASETS[dataset]["maxzoom"],
+        get_fill_color="[properties.fill_r, properties.fill_g, properties.fill_b, properties.fill_a]",
+        get_line_color=[80, 80, 80, 80],
+        highlight_color=[222, 102, 0, 200],
+        line_width_min_pixels=0.5,
+        pickable=True,
+        auto_highlight=True,
     )
+    return layer
+
 
-    ## reset crs to original and return
-    final_df = final_df.to_crs(og_crs)
-    return final_df
+def multi_layer_map(gdfs, cache_key=None):
+    """
+    Map several layers at once. Values are GeoDataFrames, or the name of a tiled
+    dataset (str) to stream it as vector tiles instead.
+    With a cache_key, each layer's payload is cached under (cache_key, layer name).
+    """
+    layers = [
+        build_mvt_layer(gdf)
+        if isinstance(gdf, str)
+        else build_layer(
+            layer_data(
+                materialize_tooltip(gdf),
+                cache_key=None if cache_key is None else (cache_key, name),
+            )
+        )
+        for name, gdf in gdfs.items()
+    ]
+    view_state = pdk.ViewState(
+        latitude=44.26, longitude=-72.57, min_zoom=6.5, zoom=MULTI_LAYER_ZOOM
+    )
+    tooltip = {"html": "{tooltip}"}
+    map_style = st.session_state.map_style
+
+    return pdk.Deck(
+        layers=layers,
+        initial_view_state=view_state,
+        tooltip=tooltip,
+        map_style=map_style,
+    )
@@ -0,0 +1,218 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Snapshot metrics from declarative specs (see constants/ACS.py).
+
+A page's specs compile into one aggregation pass over the columns they use. The
+rollup cube runs it once per geography level (statewide, every County, every
+Jurisdiction) at load time, so switching the snapshot geography is a row lookup.
+"""
+
+from functools import reduce
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class Metric(NamedTuple):
+    """
+    `agg` ("sum" or "mean") of a column, or of several columns added together,
+    optionally divided by the same aggregate of the `per` columns, times `scale`.
+    """
+
+    columns: str | tuple
+    agg: str = "sum"
+    scale: float = 1
+    per: str | tuple = ()
+
+
+def sums(columns):
+    """One sum metric per column, named after the column."""
+    return {col: Metric(col) for col in columns}
+
+
+def means(columns):
+    """One mean metric per column, named after the column."""
+    return {col: Metric(col, "mean") for col in columns}
+
+
+def _as_tuple(columns):
+    return (columns,) if isinstance(columns, str) else tuple(columns)
+
+
+def compile_metrics(specs, columns):
+    """
+    {agg: [columns]} for one aggregation pass over the frame's `columns`. Metrics
+    reading columns the frame doesn't have are left out (with an error, as
+    load_metrics used to).
+    """
+    aggs, usable = {}, {}
+    for name, spec in specs.items():
+        needed = _as_tuple(spec.columns) + _as_tuple(spec.per)
+        missing = [col for col in needed if col not in columns]
+        if missing:
+            print(f"Error missing columns {missing} loading metric {name}")
+            continue
+        usable[name] = spec
+        aggs.setdefault(spec.agg, {}).update(dict.fromkeys(needed))
+    return {agg: list(cols) for agg, cols in aggs.items()}, usable
+
+
+def _evaluate(arrays, specs):
+    """{name: values} from {(column, agg): values} arrays."""
+
+    def total(columns, agg):
+        return reduce(np.add, (arrays[(col, agg)] for col in _as_tuple(columns)))
+
+    values = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, spec in specs.items():
+            value = total(spec.columns, spec.agg)
+            if spec.per:
+                value = value / total(spec.per, spec.agg)
+            values[name] = value * spec.scale if spec.scale != 1 else value
+    return values
+
+
+def evaluate_metrics(aggregated, specs):
+    """
+    Metric values from an aggregate table (one row per group, (column, agg) columns),
+    vectorized over the groups with numpy.
+    """
+    arrays = {key: col.to_numpy() for key, col in aggregated.items()}
+    return pd.DataFrame(_evaluate(arrays, specs), index=aggregated.index)
+
+
+def _totals(df, aggs):
+    """{(column, agg): [value]} over the whole frame."""
+    return {
+        (col, agg): np.array([getattr(df[col], agg)()])
+        for agg, cols in aggs.items()
+        for col in cols
+    }
+
+
+def aggregate(df, aggs, by=None):
+    """
+    One aggregation pass (a single groupby call per agg over all its columns), with
+    a row per group of `by`, or a single row for the whole frame. Integer sums stay
+    integers.
+    """
+    if by is None:
+        # column reductions beat a groupby with a single group
+        return pd.DataFrame(_totals(df, aggs))
+    grouped = df.groupby(by, sort=False, observed=True)
+    table = pd.concat(
+        {agg: getattr(grouped[cols], agg)() for agg, cols in aggs.items()}, axis=1
+    )
+    return table.swaplevel(axis=1)
+
+
+def crosswalk_metrics(specs, crosswalk):
+    """The same specs reading renamed columns ({column: renamed}, e.g. an older vintage)."""
+
+    def rename(columns):
+        if isinstance(columns, str):
+            return crosswalk.get(columns, columns)
+        return tuple(crosswalk.get(col, col) for col in columns)
+
+    return {
+        name: spec._replace(columns=rename(spec.columns), per=rename(spec.per))
+        for name, spec in specs.items()
+    }
+
+
+def compute_metrics(df, specs):
+    """Metrics over all rows of df, as a {name: value} dict."""
+    aggs, usable = compile_metrics(specs, df.columns)
+    values = _evaluate(_totals(df, aggs), usable)
+    return {name: value[0] for name, value in values.items()}
+
+
+## Rollup cube: every metric for every geography, built once at load time
+GEOGRAPHY = ["County", "Jurisdiction"]
+ROLLUP_LEVELS = [["County"], ["Jurisdiction"], ["County", "Jurisdiction"]]
+
+
+def build_rollup(df, specs):
+    """
+    Metrics statewide, per County, per Jurisdiction and per (County, Jurisdiction),
+    one row each, indexed by (County, Jurisdiction) with "All" for a rolled-up level,
+    the same values the snapshot selectboxes use.
+    """
+    aggs, usable = compile_metrics(specs, df.columns)
+    statewide = evaluate_metrics(aggregate(df, aggs), usable)
+    statewide.index = pd.MultiIndex.from_tuples([("All", "All")], names=GEOGRAPHY)
+
+    parts = [statewide]
+    for by in ROLLUP_LEVELS:
+        table = evaluate_metrics(aggregate(df, aggs, by), usable)
+        keys = table.index.to_frame(index=False)
+        table.index = pd.MultiIndex.from_frame(
+            keys.reindex(columns=GEOGRAPHY, fill_value="All").astype(str)
+        )
+        parts.append(table)
+    return pd.concat(parts)
+
+
+def rollup_lookup(rollup, county="All", jurisdiction="All"):
+    """One geography's metrics from the cube as a (fresh) dict, or None if absent."""
+    try:
+        i = rollup.index.get_loc((county, jurisdiction))
+    except KeyError:
+        return None
+    return {name: col.iat[i] for name, col in rollup.items()}
+
+
+def snapshot_metrics(df, specs, selected_values=None, rollup=None):
+    """
+    Metrics for the snapshot selection ({"County": [...], "Jurisdiction": [...]}) of
+    the unfiltered frame df. A single County and/or Jurisdiction (or "All") is a row
+    lookup in the rollup cube when one is given; anything else is computed directly.
+    """
+    if selected_values is None:
+        return compute_metrics(df, specs)
+
+    selected = {
+        col: list(values) if isinstance(values, (list, tuple)) else [values]
+        for col, values in selected_values.items()
+        if values is not None
+    }
+    county = selected.get("County", ["All"])
+    jurisdiction = selected.get("Jurisdiction", ["All"])
+    if rollup is not None and len(county) == 1 and len(jurisdiction) == 1:
+        metrics = rollup_lookup(rollup, county[0], jurisdiction[0])
+        if metrics is not None:
+            return metrics
+
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in selected.items():
+        if "All" not in values:
+            mask &= df[col].isin(values).to_numpy()
+    return compute_metrics(df[mask], specs)
+
+
+## Deltas between two metric tables (e.g. two vintages, or local vs statewide)
+def metric_deltas(current, baseline):
+    """
+    Absolute ("<name>_delta") and percent ("<name>_pct_change") change of every metric
+    in `current` against `baseline`, in one array operation. Rows are aligned on the
+    index (geographies or metrics missing from the baseline give NaN); a one-row
+    baseline, like the statewide row of a rollup cube, is compared against every row.
+    """
+    if len(baseline) == 1:
+        base = baseline.reindex(columns=current.columns).to_numpy(dtype=float)
+    else:
+        base = baseline.reindex(index=current.index, columns=current.columns)
+        base = base.to_numpy(dtype=float)
+    values = current.to_numpy(dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = values - base
+        pct_change = delta / np.abs(base) * 100
+    columns = [f"{name}_delta" for name in current.columns] + [
+        f"{name}_pct_change" for name in current.columns
+    ]
+    return pd.DataFrame(np.hstack([delta, pct_change]), current.index, columns)
@@ -1,8 +1,8 @@
 import pandas as pd
 import streamlit as st
 
-from app_utils.constants.ACS import ACS_SOCIAL_METRICS
-from app_utils.data_loading import load_metrics
+from app_utils.constants.ACS import SOCIAL_SNAPSHOT_METRICS
+from app_utils.metrics import snapshot_metrics
 
 
 def social_snapshot_header():
@@ -15,11 +15,11 @@ def social_snapshot_header():
     )
 
 
-def compute_social_metrics(df):
-    return load_metrics(df, ACS_SOCIAL_METRICS)
+def compute_social_metrics(df, selected_values=None, rollup=None):
+    return snapshot_metrics(df, SOCIAL_SNAPSHOT_METRICS, selected_values, rollup)
 
 
-def build_social_plot_dataframes(df, metrics):
+def build_social_plot_dataframes(metrics):
     """
     Calculate a dictionary of social dataframes
     """
@@ -31,9 +31,9 @@ def build_social_plot_dataframes(df, metrics):
     }
 
 
-def social_df_metric_dict(filtered_gdf_2023):
-    metrics = compute_social_metrics(filtered_gdf_2023)
-    dfs = build_social_plot_dataframes(filtered_gdf_2023, metrics)
+def social_df_metric_dict(gdf_2023, selected_values=None, rollup=None):
+    metrics = compute_social_metrics(gdf_2023, selected_values, rollup)
+    dfs = build_social_plot_dataframes(metrics)
     return metrics, dfs
 
 
@@ -53,7 +53,7 @@ def social_snapshot(social_dfs):
 #     # Based on the system color theme, update the text color (only used in donut plots)
 #     # text_color = get_text_color(key="social_snapshot")
 #     # Define two callable dictionaries: Metrics and Plot DataFrames
-#     metrics, plot_dfs = social_df_metric_dict(filtered_dfs["social_2023"])
+#     metrics, plot_dfs = social_df_metric_dict(social_dfs["social_2023"], selected_values)
 
 #     # Render section functions
 #     render_households(metrics, plot_dfs, title_geo)
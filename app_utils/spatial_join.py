@@ -0,0 +1,119 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Spatial join engine: attach attributes from the donor polygon that overlaps each
+altered polygon the most, using an STRtree instead of a full gpd.overlay.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shapely
+
+# Web Mercator inflates areas by ~1.4x at Vermont's latitude (and more to the north),
+# which can flip the ranking for polygons spanning the state; CONUS Albers is equal-area.
+MERCATOR_CRS = 3857
+EQUAL_AREA_CRS = 5070
+
+# intersection pairs per worker task
+CHUNK_SIZE = 20_000
+# Workers are spawned, not forked: joins run inside Streamlit's threads while
+# masterload holds a load lock, and a forked child would inherit that and any other
+# lock held at the time (logging, GDAL) without the thread to release it.
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _intersection_areas(left, right):
+    return shapely.area(shapely.intersection(left, right))
+
+
+def intersection_areas(left, right, n_jobs=None, chunk_size=CHUNK_SIZE):
+    """
+    Pairwise intersection areas of two aligned geometry arrays, chunked across a
+    (spawned) process pool when there's enough work (n_jobs=1 runs inline).
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(left) <= chunk_size:
+        return _intersection_areas(left, right)
+
+    bounds = range(0, len(left), chunk_size)
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=_MP_CONTEXT) as pool:
+        chunks = pool.map(
+            _intersection_areas,
+            [left[i : i + chunk_size] for i in bounds],
+            [right[i : i + chunk_size] for i in bounds],
+        )
+        return np.concatenate(list(chunks))
+
+
+def largest_intersections(donor_geoms, altered_geoms, n_jobs=None):
+    """
+    For every altered geometry, the position of the donor geometry it overlaps the
+    most, or -1 where nothing overlaps (touching boundaries don't count).
+
+    Only bbox candidates from an STRtree over the donor layer are intersected.
+    """
+    tree = shapely.STRtree(donor_geoms)
+    alt_pos, donor_pos = tree.query(altered_geoms, predicate="intersects")
+
+    ## an altered geometry fully inside its donor overlaps by its own area,
+    ## so only the boundary-crossing pairs need an actual intersection
+    shapely.prepare(donor_geoms)
+    inside = shapely.contains_properly(donor_geoms[donor_pos], altered_geoms[alt_pos])
+    areas = np.empty(len(alt_pos))
+    areas[inside] = shapely.area(altered_geoms[alt_pos[inside]])
+    areas[~inside] = intersection_areas(
+        altered_geoms[alt_pos[~inside]], donor_geoms[donor_pos[~inside]], n_jobs=n_jobs
+    )
+
+    ## keep the largest positive-area pair per altered geometry
+    keep = areas > 0
+    alt_pos, donor_pos, areas = alt_pos[keep], donor_pos[keep], areas[keep]
+    order = np.lexsort((-areas, alt_pos))
+    alt_pos, donor_pos = alt_pos[order], donor_pos[order]
+    first = np.r_[True, alt_pos[1:] != alt_pos[:-1]]
+
+    best = np.full(len(altered_geoms), -1, dtype=np.int64)
+    best[alt_pos[first]] = donor_pos[first]
+    return best
+
+
+def add_cols_of_biggest_intersection(
+    donor_gdf, altered_gdf, add_columns=None, area_crs=MERCATOR_CRS, n_jobs=None
+):
+    """
+    Take add_columns from the donor frame and add them to the altered frame.
+
+    Adds 1 value per add_column per geometry in the altered_gdf.
+    Gets those values from the geometry in the donor gdf with which the altered_gdf geometry
+        has the **largest intersection** (measured in area_crs; EQUAL_AREA_CRS ranks
+        areas correctly, MERCATOR_CRS matches the old overlay-based results).
+
+    Returns the altered_gdf with new columns, in the donor's crs, keeping its attrs
+    (e.g. a lazy tooltip spec, which pd.merge drops).
+    """
+    add_columns = add_columns or ["County", "District"]
+
+    og_crs = donor_gdf.crs
+    best = largest_intersections(
+        donor_gdf.geometry.to_crs(epsg=area_crs).values,
+        altered_gdf.geometry.to_crs(epsg=area_crs).values,
+        n_jobs=n_jobs,
+    )
+
+    ## save indices
+    altered_gdf = altered_gdf.copy()
+    altered_gdf["alt_index"] = altered_gdf.index
+
+    matched = best >= 0
+    largest = donor_gdf[add_columns].iloc[best[matched]].reset_index(drop=True)
+    largest.insert(0, "alt_index", altered_gdf.index[matched])
+
+    ## merge relevant cols back into the og alt
+    final_df = pd.merge(left=altered_gdf, right=largest, on=["alt_index"], how="left")
+    final_df.attrs = dict(altered_gdf.attrs)
+    return final_df.to_crs(og_crs)
@@ -0,0 +1,128 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Vector tile (MVT) generation and lookup for the large statewide layers.
+Tiles are built offline (`python build_data.py vector-tiles`) and served by backend.py.
+
+Maps only stream tiles when VT_TILE_URL is set to the backend's /tiles URL as the
+browser reaches it (not localhost, unless the browser runs on the same machine) and
+the backend answers there; otherwise they send the layer as GeoJSON.
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyogrio
+import requests
+
+TILE_DIR = Path(__file__).parent.parent / "Data" / "tiles"
+TILE_URL = os.environ.get("VT_TILE_URL")
+# seconds a backend check is trusted before asking again
+TILE_CHECK_TTL = 60
+
+# dataset -> zoom range to pre-generate; deck.gl overzooms past maxzoom.
+# Only layers some map streams as tiles (the statewide Flooding page) are built.
+TILE_DATASETS = {
+    "flood_legal": {"minzoom": 6, "maxzoom": 14},
+}
+
+# properties kept in the tiles; everything else is only needed for reports
+TILE_PROPERTIES = ["tooltip", "fill_r", "fill_g", "fill_b", "fill_a"]
+
+
+def tile_dataset_dir(dataset, tile_dir=TILE_DIR):
+    return Path(tile_dir) / dataset
+
+
+def tiles_built(dataset, tile_dir=TILE_DIR):
+    return (tile_dataset_dir(dataset, tile_dir) / "metadata.json").is_file()
+
+
+_TILE_CHECKS = {}
+
+
+def tiles_available(dataset, tile_url=TILE_URL):
+    """
+    Whether a map can stream `dataset` as tiles: VT_TILE_URL is set and the backend
+    there serves the dataset's metadata. Checks are cached for TILE_CHECK_TTL seconds.
+    """
+    if tile_url is None or dataset not in TILE_DATASETS:
+        return False
+    key = (tile_url, dataset)
+    checked = _TILE_CHECKS.get(key)
+    if checked is None or time.monotonic() - checked[0] > TILE_CHECK_TTL:
+        try:
+            r = requests.get(f"{tile_url}/{dataset}/metadata.json", timeout=2)
+            ok = r.status_code == 200
+        except requests.RequestException as e:
+            print(f"Error {e} reaching the tile backend at {tile_url}")
+            ok = False
+        checked = _TILE_CHECKS[key] = (time.monotonic(), ok)
+    return checked[1]
+
+
+def tile_path(dataset, z, x, y, tile_dir=TILE_DIR):
+    """
+    Path of a single tile, or None if the dataset is unknown.
+    Missing files are normal: GDAL doesn't write empty tiles.
+    """
+    if dataset not in TILE_DATASETS:
+        return None
+    return (
+        tile_dataset_dir(dataset, tile_dir)
+        / str(int(z))
+        / str(int(x))
+        / f"{int(y)}.pbf"
+    )
+
+
+def tile_etag(path):
+    stat = Path(path).stat()
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def prepare_tile_frame(gdf):
+    """
+    Keep only what the map reads: the tooltip and the fill color split into scalar
+    properties (MVT properties can't hold lists).
+    """
+    gdf = gdf.to_crs(epsg=4326)
+    rgba = pd.DataFrame(
+        gdf["rgba_color"].tolist(),
+        columns=["fill_r", "fill_g", "fill_b", "fill_a"],
+        index=gdf.index,
+    )
+    gdf = gdf.join(rgba)
+    return gdf[[c for c in TILE_PROPERTIES if c in gdf.columns] + ["geometry"]]
+
+
+def build_vector_tiles(dataset, gdf, tile_dir=TILE_DIR):
+    """
+    Write zoom-dependent, simplified Mapbox Vector Tiles ({z}/{x}/{y}.pbf, gzipped)
+    for a processed GeoDataFrame using GDAL's MVT driver.
+    """
+    out = tile_dataset_dir(dataset, tile_dir)
+    shutil.rmtree(out, ignore_errors=True)
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    zooms = TILE_DATASETS[dataset]
+    pyogrio.write_dataframe(
+        prepare_tile_frame(gdf),
+        out,
+        driver="MVT",
+        layer=dataset,
+        dataset_options={
+            "FORMAT": "DIRECTORY",
+            "TILE_EXTENSION": "pbf",
+            "MINZOOM": zooms["minzoom"],
+            "MAXZOOM": zooms["maxzoom"],
+            # simplify aggressively at low zooms, keep full detail at maxzoom
+            "SIMPLIFICATION": 2,
+            "SIMPLIFICATION_MAX_ZOOM": 0.5,
+        },
+    )
+    return out
@@ -8,7 +8,7 @@ Wastewater Utility Functions
 import streamlit as st
 from streamlit_extras.metric_cards import style_metric_cards
 
-from app_utils.color import render_rgba_colormap_legend
+from app_utils.color import mapped_colors, render_rgba_colormap_legend
 from app_utils.data_cleaning import convert_all_timestamps_to_str
 from app_utils.mapping import add_tooltip_from_dict, map_gdf_single_layer
 
@@ -20,6 +20,20 @@ SOIL_COLOR = {
     "Not Rated": [108, 117, 125, 180],
 }
 
+SOIL_RPCS = {
+    "Addison County": "ACRPC",
+    "Bennington County": "BCRC",
+    "Chittenden County": "CCRPC",
+    "Central Vermont": "CVRPC",
+    "Lamoille County": "LCPC",
+    "Mount Ascutney": "MARC",
+    "Northeastern Vermont": "NVDA",
+    "Northwest Regional": "NWRPC",
+    "Rutland Regional": "RRPC",
+    "Two Rivers-Ottauquechee": "TRORC",
+    "Windham": "WRC",
+}
+
 
 def land_suitability_metric_cards(gdf, total_acres):
     """
@@ -69,16 +83,17 @@ def add_soil_tooltip(gdf):
             "Acreage": "Acres_fmt",
             "Municipality": "Jurisdiction",
         },
+        lazy=True,
     )
 
 
 def define_soil_colors(gdf):
-    gdf["rgba_color"] = gdf["Suitability"].apply(lambda x: SOIL_COLOR.get(x))
+    # unrated/unknown suitability values are transparent
+    gdf["rgba_color"] = mapped_colors(gdf["Suitability"], SOIL_COLOR)
     return gdf
 
 
 def clean_soil_frame(gdf):
-    gdf["polygon_coords"] = gdf.geometry.apply(extract_2d_coords)
     gdf["Acres_fmt"] = gdf["Acres"].map(lambda x: f"{x:,.0f}")
     gdf = gdf[
         [
@@ -88,16 +103,11 @@ def clean_soil_frame(gdf):
             "geometry",
             "rgba_color",
             "Acres",
-            "polygon_coords",
         ]
     ].copy()
     return gdf
 
 
-def extract_2d_coords(g):
-    return [[[x, y] for x, y in g.exterior.coords]]
-
-
 def process_soil_data(gdf):
     """
     Wrapper for multiple functions to clean and add colors to a soil frame
@@ -117,26 +127,15 @@ def render_soil_colormap():
     render_rgba_colormap_legend(SOIL_COLOR)
 
 
-def plot_wastewater(gdf):
-    return map_gdf_single_layer(gdf)
+def plot_wastewater(gdf, cache_key=None):
+    return map_gdf_single_layer(gdf, cache_key=cache_key)
 
 
 def get_soil_rpc(column):
     """
     Hardcoded frontend function for selecting a regional planning commission
     """
-    rpcs = {
-        "Addison County": "ACRPC",
-        "Bennington County": "BCRC",
-        "Chittenden County": "CCRPC",
-        "Central Vermont": "CVRPC",
-        "Lamoille County": "LCPC",
-        "Mount Ascutney": "MARC",
-        "Northeastern Vermont": "NVDA",
-        "Northwest Regional": "NWRPC",
-        "Rutland Regional": "RRPC",
-        "Two Rivers-Ottauquechee": "TRORC",
-        "Windham": "WRC",
-    }
-    rpc = column.selectbox("Regional Planning Comission", options=rpcs.keys(), index=0)
-    return rpcs.get(rpc)
+    rpc = column.selectbox(
+        "Regional Planning Comission", options=SOIL_RPCS.keys(), index=0
+    )
+    return SOIL_RPCS.get(rpc)
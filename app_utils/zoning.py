@@ -61,8 +61,8 @@ def add_zoning_tooltip(gdf):
 
 
 
-def zoning_district_map(gdf):
-    return map_gdf_single_layer(gdf)
+def zoning_district_map(gdf, cache_key=None):
+    return map_gdf_single_layer(gdf, cache_key=cache_key)
 
 
 ## reports and comparison ##
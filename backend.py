@@ -1,8 +1,16 @@
+import os
+
 from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from app_utils.api_utils import create_tile_router
 
-from app_utils.zoning import zoning_router
+# Origin(s) of the Streamlit app, comma-separated. Its maps fetch tiles straight
+# from the browser, so only pages served from there may read them.
+APP_ORIGINS = os.environ.get("VT_APP_ORIGINS", "http://localhost:8501").split(",")
 
 app = FastAPI()
+app.add_middleware(CORSMiddleware, allow_origins=APP_ORIGINS, allow_methods=["GET"])
 
 
 @app.get("/")
@@ -10,4 +18,4 @@ def read_root():
     return {"Hello": "World"}
 
 
-app.include_router(zoning_router, prefix="/load")
+app.include_router(create_tile_router())
@@ -0,0 +1,107 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Benchmark: ACS label splitting in relabel_census_cols, per-row split (old) vs.
+vectorized Arrow string kernels, on the full DP02-DP05 variable lists.
+-------------------------------------------
+python benchmarks/bench_census_labels.py
+python benchmarks/bench_census_labels.py --synthetic 2000
+-------------------------------------------
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app_utils.census import (  # noqa: E402
+    census_labels_path,
+    relabel_census_cols,
+    scrape_census_cols,
+)
+
+TABLES = ("DP02", "DP03", "DP04", "DP05")
+
+
+def split_to_cols(s, cols):
+    """The previous per-row label splitter, kept for comparison."""
+    parts = [p.strip() for p in s.split("!!")]
+    while len(parts) < len(cols):
+        parts.append("")
+    first = parts[0 : len(cols) - 1]
+    second = parts[len(cols) - 1 :]
+    second = [": ".join(second)]
+    return first + second
+
+
+def relabel_per_row(df):
+    """The previous relabel_census_cols."""
+    cols = ["Measure", "Category", "Subcategory", "Variable"]
+    df_clean = df[df["Label"].str.contains("!!")].copy()
+    df_clean.reset_index(drop=True, inplace=True)
+    splits = df_clean["Label"].apply(lambda x: list(split_to_cols(x, cols)))
+    splits_df = pd.DataFrame(splits.tolist(), columns=cols)
+    splits_df.loc[
+        (splits_df["Subcategory"].notna()) & (splits_df["Variable"] == ""), "Variable"
+    ] = "Total"
+    return pd.concat([df_clean, splits_df], axis=1)
+
+
+def acs_labels():
+    """Raw Name/Label rows for DP02-DP05, from the bundled table or the Census site."""
+    path = census_labels_path()
+    df = pd.read_parquet(path) if path.is_file() else scrape_census_cols()
+    return df.loc[df["Name"].str.startswith(TABLES), ["Name", "Label"]]
+
+
+def synthetic_labels(n):
+    """ACS-shaped labels with 2-7 "!!" parts and stray whitespace."""
+    rng = np.random.default_rng(0)
+    depths = rng.integers(2, 8, n)
+    labels = [
+        "!!".join(
+            [rng.choice(["Estimate", "Percent", "Margin of Error"])]
+            + [f" Part {i}-{d} " for d in range(depth - 1)]
+        )
+        for i, depth in enumerate(depths)
+    ]
+    return pd.DataFrame(
+        {"Name": [f"DP0{2 + i % 4}_{i:04d}E" for i in range(n)], "Label": labels}
+    )
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best * 1000:10.2f} ms")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--synthetic", type=int, help="use N synthetic labels")
+    args = parser.parse_args()
+
+    try:
+        df = synthetic_labels(args.synthetic) if args.synthetic else acs_labels()
+    except Exception as e:
+        print(f"Error {e} getting the ACS labels, use --synthetic N")
+        return
+    print(f"{len(df):,} labels\n")
+
+    old = timed("per-row split (old)", lambda: relabel_per_row(df))
+    new = timed("vectorized (Arrow kernels)", lambda: relabel_census_cols(df))
+    print(f"\nidentical: {old.equals(new)}")
+
+
+if __name__ == "__main__":
+    main()
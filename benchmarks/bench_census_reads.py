@@ -0,0 +1,174 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Benchmark: census source reads, the previous load_data path (pyogrio/pandas with
+object strings, whitespace stripping and a final copy) vs. the Arrow read with
+string[pyarrow] columns, with and without column projection.
+Reports wall time and in-memory size for every source in dataset_sources.py.
+-------------------------------------------
+python benchmarks/bench_census_reads.py
+python benchmarks/bench_census_reads.py --columns 10
+python benchmarks/bench_census_reads.py --synthetic 2000
+-------------------------------------------
+Local sources, best of 5, projected to 20 ACS columns (CSVs are read whole):
+
+source                             old ms  arrow ms  proj ms   old MB  arrow MB  proj MB
+VT_DEMOGRAPHIC_ALL.fgb               57.5      27.3     12.4     0.54      0.50     0.18
+VT_ECONOMIC_ALL.fgb                  75.4      39.1     13.2     0.71      0.67     0.18
+VT_HOUSING_ALL.fgb                   79.4      35.6     13.2     0.73      0.70     0.18
+VT_HOUSING_ALL_2013.fgb              76.2      35.2     13.7     0.73      0.70     0.19
+VT_Historic_Population.csv           26.7      21.0     21.8     0.97      0.40     0.40
+VT_SOCIAL_ALL.fgb                    84.0      37.6     15.8     0.77      0.74     0.18
+commute_habits_by_year.csv           72.6      35.2     33.8     2.65      1.25     1.25
+commute_time_by_year.csv             18.3      13.0     13.4     0.67      0.36     0.36
+med_home_value_by_year.csv           20.3      15.3     15.2     0.77      0.42     0.42
+med_smoc_by_year.csv                 41.4      28.4     27.3     2.08      1.01     1.01
+median_earnings_by_year.csv          50.5      33.6     35.0     2.64      1.24     1.24
+unemployment_rate_by_year.csv        18.6      13.3     13.5     0.67      0.36     0.36
+total                               620.9     334.7    228.2    13.93      8.34     5.93
+-------------------------------------------
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyogrio
+import shapely
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app_utils.cache import estimate_nbytes  # noqa: E402
+from app_utils.census import split_name_col  # noqa: E402
+from app_utils.data_cleaning import strip_all_whitespace  # noqa: E402
+from app_utils.data_loading import (  # noqa: E402
+    CENSUS_DIR,
+    CENSUS_SOURCES,
+    census_source_file,
+    crs_set,
+    load_census_data,
+)
+
+
+def load_census_data_old(path):
+    """The previous load_data(path, postprocess_fn=split_name_col)."""
+    if path.suffix == ".fgb":
+        df = crs_set(pyogrio.read_dataframe(path))
+    else:
+        df = pd.read_csv(path)
+    df = split_name_col(df)
+    df = strip_all_whitespace(df)
+    return df.copy()
+
+
+def source_files(census_dir):
+    files = {
+        census_source_file(src)
+        for sources in CENSUS_SOURCES
+        for src in sources.values()
+    }
+    return [Path(census_dir) / f for f in sorted(files)]
+
+
+def write_synthetic(n, out_dir):
+    """A census-shaped FGB (NAME, GEOID, 280 ACS columns) and a by-year CSV."""
+    rng = np.random.default_rng(0)
+    names = [f"Town {i} town, County {i % 14} County, Vermont" for i in range(n)]
+    geoids = [f"50{i:08d}" for i in range(n)]
+    acs = {
+        f"DP04_{i // 2:04d}{'PE' if i % 2 else 'E'}": rng.random(n) * 1000
+        for i in range(280)
+    }
+    gdf = gpd.GeoDataFrame(
+        {"GEOID": geoids, "NAME": names, **acs},
+        geometry=shapely.buffer(shapely.points(rng.random((n, 2))), 0.01),
+        crs=4326,
+    )
+    pyogrio.write_dataframe(gdf, Path(out_dir) / "SYNTHETIC.fgb")
+    years = np.repeat(np.arange(2009, 2024), n)
+    pd.DataFrame(
+        {
+            "year": years,
+            "GEOID": np.tile(geoids, 15),
+            "NAME": np.tile(names, 15),
+            "estimate": rng.integers(0, 1000, len(years)),
+        }
+    ).to_csv(Path(out_dir) / "synthetic_by_year.csv", index=False)
+    return sorted(Path(out_dir).iterdir())
+
+
+def projection(path, n_columns):
+    """GEOID plus the first n ACS estimate columns (FGB) or all columns (CSV)."""
+    if path.suffix != ".fgb":
+        return None
+    fields = pyogrio.read_info(path)["fields"]
+    acs = [f for f in fields if f.startswith("DP") and f.endswith("E")]
+    return ["GEOID", *acs[:n_columns]]
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--synthetic", type=int, help="use N synthetic towns")
+    parser.add_argument(
+        "--columns", type=int, default=20, help="ACS columns in the projected read"
+    )
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    if args.synthetic:
+        paths = write_synthetic(args.synthetic, tmp.name)
+    else:
+        paths = [p for p in source_files(CENSUS_DIR) if p.is_file()]
+        if not paths:
+            print(f"No census sources under {CENSUS_DIR}, use --synthetic N")
+            return
+
+    print(
+        f"{'source':<32}{'old ms':>9}{'arrow ms':>10}{'proj ms':>9}"
+        f"{'old MB':>9}{'arrow MB':>10}{'proj MB':>9}  same"
+    )
+    totals = np.zeros(6)
+    for path in paths:
+        t_old, old = timed(partial(load_census_data_old, path))
+        t_new, new = timed(partial(load_census_data, path))
+        columns = projection(path, args.columns)
+        t_proj, proj = timed(partial(load_census_data, path, columns=columns))
+
+        same = list(old.columns) == list(new.columns) and all(
+            old[c].astype(object).equals(new[c].astype(object)) for c in old.columns
+        )
+        row = [
+            t_old * 1000,
+            t_new * 1000,
+            t_proj * 1000,
+            *(estimate_nbytes(df) / 1024**2 for df in (old, new, proj)),
+        ]
+        totals += row
+        print(
+            f"{path.name:<32}{row[0]:9.1f}{row[1]:10.1f}{row[2]:9.1f}"
+            f"{row[3]:9.2f}{row[4]:10.2f}{row[5]:9.2f}  {same}"
+        )
+    print(
+        f"{'total':<32}{totals[0]:9.1f}{totals[1]:10.1f}{totals[2]:9.1f}"
+        f"{totals[3]:9.2f}{totals[4]:10.2f}{totals[5]:9.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
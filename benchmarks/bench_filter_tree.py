@@ -0,0 +1,102 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Benchmark: filter tree construction on census_combined (the Census Comparison page),
+recursive groupby (old) vs. drop_duplicates, and the cached lookup used on reruns.
+-------------------------------------------
+python benchmarks/bench_filter_tree.py
+python benchmarks/bench_filter_tree.py --synthetic 1500
+-------------------------------------------
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app_utils.data_loading import masterload  # noqa: E402
+from app_utils.df_filtering import dataframe_to_tree, get_filter_tree  # noqa: E402
+
+HIERARCHIES = [
+    ["Category", "Subcategory", "Variable", "Measure"],
+    ["Source", "Category", "Subcategory", "Variable", "Measure"],
+    ["County", "Jurisdiction"],
+]
+
+
+def groupby_tree(df, hierarchy_cols):
+    """The previous FilterState.dataframe_to_tree, kept for comparison."""
+    if not hierarchy_cols:
+        return None
+    col = hierarchy_cols[0]
+    tree = {}
+    for key, group in df.groupby(col):
+        tree[key] = groupby_tree(group, hierarchy_cols[1:])
+    return tree
+
+
+def synthetic_combined(n_variables, n_towns=256):
+    """Long-form frame shaped like census_combined: every variable x every town."""
+    rng = np.random.default_rng(0)
+    variables = pd.DataFrame(
+        {
+            "Source": rng.choice(
+                ["Housing", "Economic", "Demographic", "Social"], n_variables
+            ),
+            "Category": [f"CATEGORY {i // 60}" for i in range(n_variables)],
+            "Subcategory": [f"Subcategory {i // 6}" for i in range(n_variables)],
+            "Variable": [f"Variable {i}" for i in range(n_variables)],
+            "Measure": rng.choice(
+                ["Estimate", "Percent", "Margin of Error"], n_variables
+            ),
+        }
+    )
+    towns = pd.DataFrame(
+        {
+            "Jurisdiction": [f"Town {i}" for i in range(n_towns)],
+            "County": [f"County {i % 14}" for i in range(n_towns)],
+        }
+    )
+    df = variables.merge(towns, how="cross")
+    df["Value"] = rng.random(len(df))
+    return df
+
+
+def timed(label, fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<28} {best * 1000:10.2f} ms")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--synthetic", type=int, help="use N synthetic variables")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        df = synthetic_combined(args.synthetic)
+    else:
+        df = masterload("census_combined")
+    print(f"{len(df):,} rows\n")
+
+    for cols in HIERARCHIES:
+        cols = [c for c in cols if c in df.columns]
+        print(" > ".join(cols))
+        old = timed("recursive groupby (old)", lambda cols=cols: groupby_tree(df, cols))
+        new = timed("drop_duplicates", lambda cols=cols: dataframe_to_tree(df, cols))
+        timed("cached (reruns)", lambda cols=cols: get_filter_tree(df, cols))
+        print(f"  identical: {old == new}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Benchmark: STRtree largest-intersection join vs. the old gpd.overlay implementation,
+on the real flood + zoning layers (the "flooding_with_zoning" loader).
+-------------------------------------------
+python benchmarks/bench_largest_intersection.py
+python benchmarks/bench_largest_intersection.py --synthetic 20000
+-------------------------------------------
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app_utils.data_loading import ZONING_PATH, flood_path  # noqa: E402
+from app_utils.flooding import process_flood_gdf  # noqa: E402
+from app_utils.spatial_join import (  # noqa: E402
+    EQUAL_AREA_CRS,
+    add_cols_of_biggest_intersection,
+)
+
+ADD_COLUMNS = ["County", "Jurisdiction"]
+
+
+def overlay_join(donor_gdf, altered_gdf, add_columns):
+    """The previous mapping.add_cols_of_biggest_intersection, kept for comparison."""
+    og_crs = donor_gdf.crs
+    donor_gdf = donor_gdf.copy().to_crs(epsg=3857)
+    altered_gdf = altered_gdf.copy().to_crs(epsg=3857)
+    donor_gdf["donor_index"] = donor_gdf.index
+    altered_gdf["alt_index"] = altered_gdf.index
+    intersections = gpd.overlay(donor_gdf, altered_gdf, how="intersection")
+    intersections["intersect_area"] = intersections.geometry.area
+    largest = intersections.sort_values(
+        "intersect_area", ascending=False
+    ).drop_duplicates("alt_index", keep="first")
+    merge_cols = ["alt_index"] + add_columns
+    final_df = pd.merge(
+        left=altered_gdf, right=largest[merge_cols], on=["alt_index"], how="left"
+    )
+    return final_df.to_crs(og_crs)
+
+
+def real_layers():
+    zoning = gpd.read_file(ZONING_PATH)[ADD_COLUMNS + ["geometry"]].to_crs(4326)
+    flood = process_flood_gdf(gpd.read_file(flood_path())).to_crs(4326)
+    return zoning, flood
+
+
+def synthetic_layers(n):
+    """
+    Zoning-like grid of detailed districts and n smaller random flood polygons over
+    Vermont, for when the real layers aren't available.
+    """
+    rng = np.random.default_rng(0)
+    xs, ys = np.meshgrid(np.linspace(-73.4, -71.5, 40), np.linspace(42.7, 45.0, 40))
+    step = 1.9 / 39
+    districts = shapely.segmentize(
+        shapely.box(xs.ravel(), ys.ravel(), xs.ravel() + step, ys.ravel() + step),
+        step / 100,
+    )
+    zoning = gpd.GeoDataFrame(
+        {
+            "County": [f"County {i % 14}" for i in range(xs.size)],
+            "Jurisdiction": [f"Town {i}" for i in range(xs.size)],
+        },
+        geometry=districts,
+        crs=4326,
+    )
+    centers = shapely.points(rng.uniform(-73.4, -71.5, n), rng.uniform(42.7, 45.0, n))
+    flood = gpd.GeoDataFrame(
+        {"FLD_ZONE": "AE"},
+        index=range(n),
+        geometry=shapely.buffer(centers, rng.uniform(0.001, 0.01, n), quad_segs=8),
+        crs=4326,
+    )
+    return zoning, flood
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    out = fn()
+    print(f"{label:<40} {time.perf_counter() - start:8.2f}s")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--synthetic", type=int, help="use N synthetic flood polygons")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        zoning, flood = (
+            synthetic_layers(args.synthetic) if args.synthetic else real_layers()
+        )
+    except Exception as e:
+        print(
+            f"Error {e} reading the real layers (git-lfs not pulled?), use --synthetic N"
+        )
+        return
+    print(f"{len(zoning):,} zoning polygons, {len(flood):,} flood polygons\n")
+
+    old = timed("gpd.overlay (old)", lambda: overlay_join(zoning, flood, ADD_COLUMNS))
+    new = timed(
+        "STRtree, EPSG:3857",
+        lambda: add_cols_of_biggest_intersection(
+            zoning, flood, ADD_COLUMNS, n_jobs=args.n_jobs
+        ),
+    )
+    equal_area = timed(
+        f"STRtree, EPSG:{EQUAL_AREA_CRS} (equal-area)",
+        lambda: add_cols_of_biggest_intersection(
+            zoning, flood, ADD_COLUMNS, area_crs=EQUAL_AREA_CRS, n_jobs=args.n_jobs
+        ),
+    )
+
+    same = (old[ADD_COLUMNS].fillna("") == new[ADD_COLUMNS].fillna("")).all(axis=1)
+    print(f"\nrows matching the overlay result: {same.mean():.4%}")
+    flipped = (new[ADD_COLUMNS].fillna("") != equal_area[ADD_COLUMNS].fillna("")).any(
+        axis=1
+    )
+    print(f"rows whose match changes under equal-area: {flipped.sum():,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Open Research Community Accelorator
+Vermont Data App
+
+Offline build steps for precomputed data artifacts.
+Run these from the repo root whenever the source data changes:
+-------------------------------------------
+python build_data.py convert [source ...] [--batch-size N]
+python build_data.py zoning-partitions
+python build_data.py vector-tiles [dataset ...]
+python build_data.py joins [join ...]
+python build_data.py pyramid [dataset ...]
+python build_data.py census-labels [--year YEAR]   (needs network access)
+python build_data.py clean-census
+-------------------------------------------
+"""
+
+import argparse
+
+from app_utils.census import ACS_LABELS_YEAR, build_census_labels
+from app_utils.conversion import BATCH_SIZE, CONVERSIONS, convert_source
+from app_utils.data_loading import (
+    JOIN_DATASETS,
+    PYRAMID_DATASETS,
+    build_join_artifacts,
+    build_pyramid,
+    build_zoning_partitions,
+    clean_census_sources,
+    masterload,
+)
+from app_utils.mapping import materialize_tooltip
+from app_utils.tiles import TILE_DATASETS, build_vector_tiles
+
+
+def convert(args):
+    for name in args.sources or CONVERSIONS:
+        source = CONVERSIONS[name]["source"]
+        if not args.sources and not source.exists():
+            print(f"Skipping {name}, {source} doesn't exist")
+            continue
+        rows = convert_source(name, batch_size=args.batch_size)
+        print(f"Wrote {rows:,} {name} features to {CONVERSIONS[name]['target']}")
+
+
+def zoning_partitions(args):
+    manifest = build_zoning_partitions()
+    print(f"Wrote {len(manifest['partitions'])} zoning partitions")
+
+
+def vector_tiles(args):
+    for dataset in args.datasets or TILE_DATASETS:
+        gdf = materialize_tooltip(masterload(dataset))
+        out = build_vector_tiles(dataset, gdf)
+        print(f"Wrote {dataset} tiles to {out}")
+
+
+def joins(args):
+    manifest = build_join_artifacts(args.joins or None)
+    print(f"{len(manifest['artifacts'])} join artifacts in the manifest")
+
+
+def pyramid(args):
+    manifest, failed = build_pyramid(args.datasets or None)
+    print(f"{len(manifest['levels'])} simplification levels in the manifest")
+    if failed:
+        names = ", ".join(f"{name} ({rpc or 'statewide'})" for name, rpc in failed)
+        raise SystemExit(f"Failed to build: {names}")
+
+
+def census_labels(args):
+    path = build_census_labels(args.year)
+    print(f"Wrote ACS {args.year} variable labels to {path}")
+
+
+def clean_census(args):
+    cleaned = clean_census_sources()
+    print(f"Stripped whitespace from {len(cleaned)} census source files")
+    for path in cleaned:
+        print(f"  {path}")
+
+
+def names(choices):
+    """
+    argparse options for zero or more names out of `choices`. choices= itself can't
+    be used: argparse rejects the empty default of nargs="*" ("invalid choice: []").
+    """
+    choices = list(choices)
+
+    def name(value):
+        if value not in choices:
+            raise argparse.ArgumentTypeError(
+                f"invalid choice: {value!r} (choose from {', '.join(choices)})"
+            )
+        return value
+
+    return {"nargs": "*", "type": name, "metavar": "{" + ",".join(choices) + "}"}
+
+
+COMMANDS = {
+    "convert": (
+        convert,
+        "Stream large vector sources into filtered, simplified, indexed FlatGeobuf",
+        [
+            (["sources"], names(CONVERSIONS)),
+            (["--batch-size"], {"type": int, "default": BATCH_SIZE}),
+        ],
+    ),
+    "zoning-partitions": (
+        zoning_partitions,
+        "Split the processed zoning layer into per-RPC/County GeoParquet files",
+        [],
+    ),
+    "vector-tiles": (
+        vector_tiles,
+        "Pre-generate Mapbox Vector Tiles for the large map layers",
+        [(["datasets"], names(TILE_DATASETS))],
+    ),
+    "joins": (
+        joins,
+        "Materialize the registered spatial joins so masterload can skip them",
+        [(["joins"], names(JOIN_DATASETS))],
+    ),
+    "pyramid": (
+        pyramid,
+        "Precompute simplified geometry for each zoom level of the statewide maps",
+        [(["datasets"], names(PYRAMID_DATASETS))],
+    ),
+    "census-labels": (
+        census_labels,
+        "Scrape the ACS profile variable labels into the bundled Parquet table",
+        [(["--year"], {"type": int, "default": ACS_LABELS_YEAR})],
+    ),
+    "clean-census": (
+        clean_census,
+        "Strip stray whitespace from the census source files (loads don't)",
+        [],
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build precomputed data artifacts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text, arguments) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        for flags, kwargs in arguments:
+            subparser.add_argument(*flags, **kwargs)
+
+    args = parser.parse_args()
+    COMMANDS[args.command][0](args)
+
+
+if __name__ == "__main__":
+    main()
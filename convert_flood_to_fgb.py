@@ -1,7 +1,10 @@
-import pyogrio
+"""
+Convert the FEMA flood hazard GeoJSON to FlatGeobuf.
+Same as `python build_data.py convert flood`, kept for old instructions.
+"""
 
-flood_gdf = pyogrio.read_dataframe(
-    "/Users/iansargent/Desktop/ORCA/Steamlit App Testing/VT_Flood_Hazard.geojson"
-)
+from app_utils.conversion import CONVERSIONS, convert_source
 
-pyogrio.write_dataframe(flood_gdf, "VT_Flood_Hazard.fgb")
+if __name__ == "__main__":
+    rows = convert_source("flood")
+    print(f"Wrote {rows:,} flood features to {CONVERSIONS['flood']['target']}")
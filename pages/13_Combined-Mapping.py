@@ -6,15 +6,15 @@ Description: Combined page for mapping lots of different variables.
 
 import streamlit as st
 
-from app_utils.data_loading import masterload
+from app_utils.data_loading import load_for_zoom, zoning_window
 from app_utils.df_filtering import filter_wrapper
-from app_utils.mapping import multi_layer_map
+from app_utils.mapping import MULTI_LAYER_ZOOM, multi_layer_map
 from app_utils.streamlit_config import streamlit_config
 from app_utils.wastewater import get_soil_rpc
 
 
-def combo_map(gdfs):
-    map = multi_layer_map(gdfs)
+def combo_map(gdfs, cache_key=None):
+    map = multi_layer_map(gdfs, cache_key=cache_key)
     st.pydeck_chart(map)
 
 
@@ -25,25 +25,14 @@ def main():
     col1, *cols = st.columns(len(filter_cols) + 1)
     rpc = get_soil_rpc(col1)
 
-    ## load data
-    zoning_gdf = masterload("zoning")
-    flooding_gdf = masterload("flooding_with_zoning")
-    soil_gdf = masterload("soil_septic", rpc=rpc)
-
-    ## filter the zoning_gdf
-    zoning_gdf = zoning_gdf[zoning_gdf["RPC"] == rpc]
-
-    # Layer selection
-    layer_options = {
-        "Zoning": zoning_gdf,
-        "Flooding": flooding_gdf,
-        "Wastewater": soil_gdf,
-    }
+    ## load data, simplified for the statewide view when the pyramid is built
+    zoning_gdf = load_for_zoom("zoning", MULTI_LAYER_ZOOM, rpc=rpc)  # only this rpc
 
     # Use sidebar toggle buttons to switch layers "on" and "off"
+    layer_options = ["Zoning", "Flooding", "Wastewater"]
     selected_layers_toggle = []
     st.sidebar.subheader("Map Layers")
-    for option in layer_options.keys():
+    for option in layer_options:
         layer = st.sidebar.toggle(label=f"{option}", value=False)
         if layer:
             selected_layers_toggle.append(option)
@@ -57,11 +46,22 @@ def main():
         passed_cols=cols,
     )
 
+    # flood and soil layers are only read around the selected jurisdictions
+    window = zoning_window(rpc, jurisdiction=filter_state.selections["Jurisdiction"])
+    loaders = {
+        "Zoning": lambda: zoning_gdf,
+        "Flooding": lambda: load_for_zoom(
+            "flooding_with_zoning", MULTI_LAYER_ZOOM, bbox=window
+        ),
+        "Wastewater": lambda: load_for_zoom(
+            "soil_septic", MULTI_LAYER_ZOOM, rpc=rpc, bbox=window
+        ),
+    }
     dfs = {
-        name: filter_state.apply_filters(layer_options[name])
+        name: filter_state.apply_filters(loaders[name]())
         for name in selected_layers_toggle
     }
-    combo_map(dfs)
+    combo_map(dfs, cache_key=("combined", rpc, filter_state.cache_key()))
 
 
 if __name__ == "__main__":
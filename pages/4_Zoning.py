@@ -23,8 +23,8 @@ from app_utils.zoning import (
 )
 
 
-def zoning_mapping_tab(df, color_map):
-    map = zoning_district_map(df)
+def zoning_mapping_tab(df, color_map, cache_key=None):
+    map = zoning_district_map(df, cache_key=cache_key)
     map_col, legend_col = st.columns([4, 1])
     map_col.pydeck_chart(map, height=550)
     with legend_col:
@@ -78,26 +78,30 @@ def main():
     # Page header
     st.header("Zoning", divider="grey")
 
-    # Load the zoning data from GitHub, clean it, add colors,
-    zoning_gdf = masterload("zoning")
+    # Attribute-only zoning table (no geometry) to drive the filters
+    zoning_index = masterload("zoning_index")
 
     # User filter selections
     filter_state = filter_wrapper(
-        zoning_gdf,
+        zoning_index,
         filter_columns=["County", "Jurisdiction", "District Name"],
         allow_all={"County": False, "Jurisdiction": True, "District Name": True},
     )
-    # Apply the selected filters
+
+    # Only load the geometry for the selected counties, then apply the remaining filters
+    zoning_gdf = masterload("zoning", county=tuple(filter_state.selections["County"]))
     filtered_gdf = filter_state.apply_filters(zoning_gdf)
     
     # Define zoning tabs
     mapping, report = st.tabs(["Map", "Report",])
     
     # The color map to use for the map legend
-    color_map = dict(zip(zoning_gdf['District Type'], zoning_gdf['rgba_color'], strict=False))
+    color_map = dict(zip(zoning_index['District Type'], zoning_index['rgba_color'], strict=False))
     
     with mapping:
-        zoning_mapping_tab(filtered_gdf, color_map)  
+        zoning_mapping_tab(
+            filtered_gdf, color_map, cache_key=("zoning", filter_state.cache_key())
+        )
     with report: 
         zoning_report_tab(filtered_gdf, compute_acerage_metrics(filtered_gdf))
 
@@ -9,7 +9,7 @@ Wastewater Page
 # Necessary imports
 import streamlit as st
 
-from app_utils.data_loading import masterload
+from app_utils.data_loading import masterload, zoning_window
 from app_utils.df_filtering import filter_wrapper
 from app_utils.streamlit_config import streamlit_config
 from app_utils.wastewater import (
@@ -25,21 +25,26 @@ def main():
     st.header("Wastewater Infrastructure", divider="grey")
     column1, *cols = st.columns(3)
     rpc = get_soil_rpc(column1)
-    suit_gdf = masterload("soil_septic", rpc)
+    # filters come from the attributes, so only the selected towns' soil is read
+    suit_index = masterload("soil_septic_index", rpc)
 
     filter_state = filter_wrapper(
-        df=suit_gdf,
+        df=suit_index,
         filter_columns=["Jurisdiction", "Suitability"],
         presented_cols=["Municipality", "Soil Suitability"],
         allow_all={"Jurisdiction": True, "Suitability": True},
         defaults={"Suitability": ["Well Suited", "Moderately Suited"]},
         passed_cols=cols,  ## so that we start at col2
     )
+    window = zoning_window(rpc, jurisdiction=filter_state.selections["Jurisdiction"])
+    suit_gdf = masterload("soil_septic", rpc, bbox=window)
     filtered_gdf = filter_state.apply_filters(suit_gdf)
     filtered_gdf = process_soil_data(filtered_gdf)
 
     map_col, legend_col = st.columns([4, 1])
-    map = plot_wastewater(filtered_gdf)
+    map = plot_wastewater(
+        filtered_gdf, cache_key=("soil_septic", rpc, filter_state.cache_key())
+    )
     map_col.pydeck_chart(map)
     with legend_col:
         render_soil_colormap()
@@ -27,10 +27,13 @@ def main():
     tidy_2023 = housing_dfs["housing_2023_tidy"]
 
     with mapping:
-        mapping_tab(data=tidy_2023, map_color="Reds")
+        mapping_tab(data=tidy_2023, map_color="Reds", cache_key="housing")
 
     with snapshot:
-        housing_snapshot(housing_dfs)
+        housing_snapshot(
+            masterload("census_housing_snapshot"),
+            rollup=masterload("census_housing_rollup"),
+        )
 
     with compare:
         housing_dict = {
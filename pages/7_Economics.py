@@ -24,10 +24,13 @@ def main():
     tidy_2023 = econ_dfs["econ_2023_tidy"]
 
     with mapping:
-        mapping_tab(data=tidy_2023, map_color="Greens")
+        mapping_tab(data=tidy_2023, map_color="Greens", cache_key="economics")
 
     with snapshot:
-        economic_snapshot(econ_dfs)
+        economic_snapshot(
+            masterload("census_economics_snapshot"),
+            rollup=masterload("census_economics_rollup"),
+        )
 
     with compare:
         econ_dict = {"Economics 2023": tidy_2023}
@@ -25,10 +25,13 @@ def main():
     tidy_2023 = demog_dfs["demogs_2023_tidy"]
 
     with mapping:
-        mapping_tab(data=tidy_2023, map_color="Blues")
+        mapping_tab(data=tidy_2023, map_color="Blues", cache_key="demographics")
 
     with snapshot:
-        demographic_snapshot(demog_dfs)
+        demographic_snapshot(
+            masterload("census_demographics_snapshot"),
+            rollup=masterload("census_demographics_rollup"),
+        )
 
     with compare:
         data_dict = {"Demographics 2023": tidy_2023}
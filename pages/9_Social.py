@@ -24,10 +24,10 @@ def main():
     tidy_2023 = social_dfs["social_2023_tidy"]
 
     with mapping:
-        mapping_tab(data=tidy_2023, map_color="Purples")
+        mapping_tab(data=tidy_2023, map_color="Purples", cache_key="social")
 
     with snapshot:
-        social_snapshot(social_dfs)
+        social_snapshot(masterload("census_social_snapshot"))
 
     with compare:
         data_dict = {"Social 2023": tidy_2023}
@@ -11,13 +11,20 @@ import streamlit as st
 
 from app_utils.data_loading import masterload
 from app_utils.flooding import plot_flood_gdf
+from app_utils.mapping import multi_layer_map
 from app_utils.streamlit_config import streamlit_config
+from app_utils.tiles import tiles_available
 
 
 def main():
     # Page header
     st.header("Mandatory Flood Insurance")
 
+    # Statewide flood zones: stream vector tiles when a tile backend is configured
+    if tiles_available("flood_legal"):
+        st.pydeck_chart(multi_layer_map({"Flooding": "flood_legal"}))
+        return
+
     # Load the FEMA flood hazard zones dataset and clean it
     flood_gdf = masterload("flood_legal")
 